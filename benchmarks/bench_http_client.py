@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Per-call latency of check_ip with a fresh HTTP client per request (old
+behaviour) versus the shared pooled client, measured against a local stub.
+
+    python benchmarks/bench_http_client.py --calls 500 --latency 0.002
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import httpx  # noqa: E402
+
+from abuseipdb_mcp.modules import AbuseIPDBServer  # noqa: E402
+from stub_api import StubAPI, serve_stub  # noqa: E402
+
+
+class PerRequestClientServer(AbuseIPDBServer):
+    """Reproduces the previous behaviour: one client (and handshake) per call."""
+
+    async def _make_request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        async with self._create_http_client() as client:
+            return await client.request(method, url, **kwargs)
+
+
+async def _measure(server: AbuseIPDBServer, base_url: str, calls: int) -> list:
+    server.base_url = base_url
+    timings = []
+    try:
+        for i in range(calls):
+            start = time.perf_counter()
+            await server.check_ip({"ipAddress": f"45.33.{i // 256 % 256}.{i % 256}", "verbose": False})
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        await server.aclose()
+    return timings
+
+
+def _report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(timings):7.3f} ms  "
+          f"p50 {statistics.median(timings):7.3f} ms  p95 {p95:7.3f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub response delay in seconds")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ABUSEIPDB_API_KEY", "benchmark")
+    stub = StubAPI(latency=args.latency)
+    async with serve_stub(stub) as base_url:
+        before = await _measure(PerRequestClientServer(), base_url, args.calls)
+        after = await _measure(AbuseIPDBServer(), base_url, args.calls)
+
+    print(f"{args.calls} sequential check_ip calls against {base_url}")
+    _report("client per request", before)
+    _report("pooled client", after)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Throughput of IP validation/normalization on synthetic log-line addresses:
+the previous per-call regex check versus iputils.normalize_ip, then
+extract_ips over sample log lines (whose expected addresses are checked
+first; the run fails if one is missed).
+
+    python benchmarks/bench_ip_parse.py --count 2000000
+"""
+
+import argparse
+import ipaddress
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from abuseipdb_mcp.iputils import extract_ips, non_public_scope, normalize_ip  # noqa: E402
+
+# Log lines and the addresses extract_ips must find in them
+LOG_LINES = (
+    ("sshd[812]: Failed password for root from 203.0.113.7 port 52114 ssh2", ["203.0.113.7"]),
+    ("sshd[812]: Received disconnect from 2001:db8:1::5: 11: Bye Bye [preauth]", ["2001:db8:1::5"]),
+    ("sshd[812]: Connection from 2600:1f18::1.", ["2600:1f18::1"]),
+    ("sshd[812]: Connection closed by 2001:db8::7 port 40022 [preauth]", ["2001:db8::7"]),
+    ("Jan 12 10:30:00 host sshd[812]: Invalid user admin from [2001:db8::9]:22", ["2001:db8::9"]),
+    ("nginx: ::ffff:192.0.2.44 - - \"GET / HTTP/1.1\" 200 612", ["192.0.2.44"]),
+    ("kernel: IN=eth0 MAC=00:1a:2b:3c:4d:5e SRC=198.51.100.23 DST=10.0.0.1", ["198.51.100.23", "10.0.0.1"]),
+)
+
+
+def legacy_is_valid_ip(ip: str) -> bool:
+    """The regex validation normalize_ip replaced, patterns compiled on every call."""
+    if not ip:
+        return False
+    ipv4_pattern = r"^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$"
+    ipv6_pattern = r"^(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$|^::1$|^::$"
+    return bool(re.match(ipv4_pattern, ip) or re.match(ipv6_pattern, ip))
+
+
+def ipaddress_only(ip: str):
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+
+def sample_addresses(count: int, seed: int = 1):
+    """Mostly IPv4 with some IPv6 in several spellings, as seen in real logs."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(min(count, 50000)):
+        roll = rng.random()
+        if roll < 0.85:
+            pool.append(".".join(str(rng.randrange(256)) for _ in range(4)))
+        elif roll < 0.95:
+            pool.append(f"2001:db8:{rng.randrange(65536):x}::{rng.randrange(65536):x}")
+        elif roll < 0.98:
+            pool.append(f"::ffff:{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}")
+        else:
+            pool.append(f"fe80::{rng.randrange(65536):x}%eth0")
+    return [pool[i % len(pool)] for i in range(count)]
+
+
+def check_log_lines() -> list:
+    """Describe every LOG_LINES entry whose extracted addresses differ from the expected ones."""
+    problems = []
+    for line, expected in LOG_LINES:
+        found = list(extract_ips(line))
+        if found != expected:
+            problems.append(f"{line!r}: found {found}, expected {expected}")
+    return problems
+
+
+def _measure(label: str, fn, addresses):
+    start = time.perf_counter()
+    accepted = sum(1 for address in addresses if fn(address))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {len(addresses) / elapsed / 1e6:6.2f} M addr/s  ({elapsed:6.2f}s, {accepted} accepted)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    problems = check_log_lines()
+    for problem in problems:
+        print(f"MISSED {problem}")
+    if problems:
+        sys.exit(1)
+
+    addresses = sample_addresses(args.count)
+    print(f"{args.count} addresses")
+    _measure("legacy regex is_valid_ip", legacy_is_valid_ip, addresses)
+    _measure("ipaddress.ip_address", ipaddress_only, addresses)
+    _measure("normalize_ip", normalize_ip, addresses)
+    _measure("normalize_ip + non_public_scope", lambda ip: (n := normalize_ip(ip)) and non_public_scope(n) is None, addresses)
+
+    lines = [LOG_LINES[i % len(LOG_LINES)][0] for i in range(args.count // 10)]
+    start = time.perf_counter()
+    found = sum(1 for line in lines for _ in extract_ips(line))
+    elapsed = time.perf_counter() - start
+    print(f"{'extract_ips':<32} {len(lines) / elapsed / 1e6:6.2f} M lines/s ({elapsed:6.2f}s, {found} addresses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Wall time of paging through /reports on the local stub, one page after the
+other versus pagination.prefetch_pages, with a consumer that works through
+each page synchronously (as get_reports does). The stub runs in its own
+thread so that, as with the real API, responses are produced while the
+consumer blocks the event loop.
+
+    python benchmarks/bench_pagination.py --pages 5 --latency-ms 200 --consume-ms 100
+
+Fails (exit code 1) when prefetching saves less than half of the ideal
+overlap of fetching with consuming.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from abuseipdb_mcp.pagination import prefetch_pages  # noqa: E402
+from stub_api import StubAPI, serve_stub  # noqa: E402
+
+PER_PAGE = 100
+
+
+@contextlib.contextmanager
+def stub_in_thread(stub: StubAPI):
+    """Serve the stub from a separate event loop thread and yield its base URL."""
+    started = threading.Event()
+    stop = threading.Event()
+    box = {}
+
+    async def serve():
+        async with serve_stub(stub) as base_url:
+            box["url"] = base_url
+            started.set()
+            while not stop.is_set():
+                await asyncio.sleep(0.01)
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait()
+    try:
+        yield box["url"]
+    finally:
+        stop.set()
+        thread.join()
+
+
+async def serial(fetch, consume_seconds: float) -> float:
+    start = time.perf_counter()
+    page = await fetch(1)
+    while True:
+        time.sleep(consume_seconds)
+        if page["page"] >= page["lastPage"]:
+            break
+        page = await fetch(page["page"] + 1)
+    return time.perf_counter() - start
+
+
+async def prefetched(fetch, consume_seconds: float) -> float:
+    start = time.perf_counter()
+    async for _ in prefetch_pages(fetch, lambda page: page["page"] < page["lastPage"]):
+        time.sleep(consume_seconds)
+    return time.perf_counter() - start
+
+
+async def run(base_url: str, consume_seconds: float):
+    async with httpx.AsyncClient(headers={"Key": "benchmark"}) as client:
+        async def fetch(page: int) -> dict:
+            response = await client.get(
+                f"{base_url}/reports",
+                params={"ipAddress": "45.33.32.156", "page": str(page), "perPage": str(PER_PAGE)},
+            )
+            return response.json()["data"]
+
+        # Open the connection first so neither run pays for it
+        await fetch(1)
+        return await serial(fetch, consume_seconds), await prefetched(fetch, consume_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--consume-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    latency, consume_seconds = args.latency_ms / 1000, args.consume_ms / 1000
+    stub = StubAPI(latency=latency, total_reports=args.pages * PER_PAGE)
+    with stub_in_thread(stub) as base_url:
+        before, after = asyncio.run(run(base_url, consume_seconds))
+
+    # Every page but the first can hide its fetch behind the consumption of the previous one
+    ideal_saving = (args.pages - 1) * min(latency, consume_seconds)
+    print(f"serial      {before * 1000:8.1f} ms  ({args.pages} pages)")
+    print(f"prefetched  {after * 1000:8.1f} ms  (saved {(before - after) * 1000:.1f} ms of an ideal {ideal_saving * 1000:.1f} ms)")
+    if before - after < ideal_saving / 2:
+        print("REGRESSION fetches did not overlap page processing")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
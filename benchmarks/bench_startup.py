@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Cold start of the stdio transport as an MCP client sees it: spawn
+`python -m abuseipdb_mcp.server`, send initialize and time the response,
+then time the first check_ip (which opens the HTTP client) against a local
+stub. Each run is a fresh process.
+
+    python benchmarks/bench_startup.py --runs 20
+    python benchmarks/bench_startup.py --json startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --tolerance 0.2
+
+With --baseline, the run fails (exit code 1) when a phase's median is more
+than --tolerance slower than the saved results.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from stub_api import StubAPI, serve_stub  # noqa: E402
+
+PHASES = ("initialize", "first_call")
+
+INITIALIZE = {
+    "jsonrpc": "2.0", "id": 0, "method": "initialize",
+    "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "bench-startup", "version": "1"}},
+}
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+async def _send(process, message: dict):
+    process.stdin.write((json.dumps(message) + "\n").encode())
+    await process.stdin.drain()
+
+
+async def _response(process, request_id: int) -> dict:
+    while True:
+        line = await process.stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before answering")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+async def _run_once(base_url: str, state_dir: str) -> dict:
+    """Spawn one stdio server and time initialize and the first tool call (ms from spawn)."""
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT / "src"),
+        ABUSEIPDB_API_KEY="benchmark",
+        ABUSEIPDB_BASE_URL=base_url,
+    )
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "abuseipdb_mcp.server",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        cwd=state_dir, env=env,
+    )
+    try:
+        await _send(process, INITIALIZE)
+        await _response(process, 0)
+        initialized = time.perf_counter()
+        await _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        await _send(process, {
+            "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "check_ip", "arguments": {"ipAddress": "45.33.32.156", "verbose": False}},
+        })
+        await _response(process, 1)
+        called = time.perf_counter()
+    finally:
+        process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+    return {"initialize": (initialized - start) * 1000, "first_call": (called - initialized) * 1000}
+
+
+def _summary(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "median_ms": statistics.median(ordered),
+        "p95_ms": _percentile(ordered, 0.95),
+        "min_ms": ordered[0],
+    }
+
+
+def _regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    problems = []
+    for phase, result in results.items():
+        before = baseline.get(phase)
+        if before and result["median_ms"] > before["median_ms"] * (1 + tolerance):
+            problems.append(f"{phase}: median {result['median_ms']:.1f} ms vs {before['median_ms']:.1f} ms")
+    return problems
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs first (fills the OS file cache and .pyc files)")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results written earlier with --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against the baseline")
+    args = parser.parse_args()
+
+    samples = {phase: [] for phase in PHASES}
+    async with serve_stub(StubAPI()) as base_url:
+        with tempfile.TemporaryDirectory() as state_dir:
+            for run in range(args.warmup + args.runs):
+                timings = await _run_once(base_url, state_dir)
+                if run >= args.warmup:
+                    for phase in PHASES:
+                        samples[phase].append(timings[phase])
+
+    results = {phase: _summary(samples[phase]) for phase in PHASES}
+    for phase, result in results.items():
+        print(
+            f"{phase:<12} median {result['median_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  "
+            f"min {result['min_ms']:8.1f} ms  ({args.runs} runs)"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        problems = _regressions(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Load test check_ip, report_ip and the Streamable HTTP transport against a
+local AbuseIPDB stub, at a fixed concurrency, and report latency
+percentiles, throughput, error rate and upstream calls per scenario.
+
+    python benchmarks/load_test.py --requests 2000 --concurrency 50 --latency 0.02
+    python benchmarks/load_test.py --scenario http --workers 2 --error-rate 0.02 --throttle-rate 0.01
+    python benchmarks/load_test.py --json results.json
+    python benchmarks/load_test.py --baseline results.json --tolerance 0.2
+
+check_ip draws addresses from a pool of --unique-ips, so the pool size
+controls the cache hit ratio. With --baseline, the run fails (exit code 1)
+when a scenario's p95 latency or throughput is more than --tolerance worse
+than the saved results.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import httpx  # noqa: E402
+
+from abuseipdb_mcp.modules import AbuseIPDBServer  # noqa: E402
+from stub_api import StubAPI, serve_stub  # noqa: E402
+
+SCENARIOS = ("check_ip", "report_ip", "http")
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def _address(i: int) -> str:
+    return f"45.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+
+
+async def _drive(call, requests: int, concurrency: int) -> dict:
+    """Run call(i) for i in range(requests) with at most concurrency in flight."""
+    counter = itertools.count()
+    timings = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if i >= requests:
+                return
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            timings.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "error_rate": errors / requests if requests else 0.0,
+        "throughput": requests / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": _percentile(timings, 0.50),
+        "p95_ms": _percentile(timings, 0.95),
+        "p99_ms": _percentile(timings, 0.99),
+    }
+
+
+async def _run_in_process(scenario: str, base_url: str, args) -> dict:
+    server = AbuseIPDBServer()
+    server.base_url = base_url
+
+    async def check_ip(i: int) -> bool:
+        result = await server.check_ip({"ipAddress": _address(i % args.unique_ips), "verbose": args.verbose})
+        return not result[0].text.startswith("❌")
+
+    async def report_ip(i: int) -> bool:
+        result = await server.report_ip({"ip": _address(i), "categories": "18,22", "comment": "load test", "queue": False})
+        return not result[0].text.startswith("❌")
+
+    try:
+        return await _drive(check_ip if scenario == "check_ip" else report_ip, args.requests, args.concurrency)
+    finally:
+        await server.aclose()
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _start_http_server(base_url: str, workers: int, state_dir: str) -> tuple:
+    """Start the server with the HTTP transport in a subprocess and wait until it answers."""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        ABUSEIPDB_BASE_URL=base_url,
+        PYTHONPATH=str(ROOT / "src"),
+        MCP_HTTP_JSON_RESPONSE="true",
+        # Fresh shared cache/rate limit files so earlier runs don't warm the cache
+        ABUSEIPDB_CACHE_PATH=os.path.join(state_dir, "cache.db"),
+        ABUSEIPDB_RATE_SHARED_PATH=os.path.join(state_dir, "ratelimit.db") if workers > 1 else "",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "abuseipdb_mcp.server", "-t", "http", "--host", "127.0.0.1", "-p", str(port), "-w", str(workers)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient() as client:
+        for _ in range(200):
+            try:
+                if (await client.get(f"{url}/metrics")).status_code == 200:
+                    return process, url
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("HTTP server did not start")
+
+
+async def _run_http(base_url: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as state_dir:
+        return await _run_http_server(base_url, args, state_dir)
+
+
+async def _run_http_server(base_url: str, args, state_dir: str) -> dict:
+    process, url = await _start_http_server(base_url, args.workers, state_dir)
+    headers = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60.0) as client:
+            # One MCP session per virtual user, created up front so only tool calls are timed;
+            # several workers serve stateless requests, which need no session
+            sessions = []
+            for _ in range(args.concurrency if args.workers == 1 else 0):
+                response = await client.post("/mcp", json={
+                    "jsonrpc": "2.0", "id": 0, "method": "initialize",
+                    "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "load-test", "version": "1"}},
+                })
+                session = {"Mcp-Session-Id": response.headers["mcp-session-id"]}
+                await client.post("/mcp", headers=session, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+                sessions.append(session)
+
+            async def call(i: int) -> bool:
+                response = await client.post(
+                    "/mcp",
+                    headers=sessions[i % len(sessions)] if sessions else None,
+                    json={
+                        "jsonrpc": "2.0", "id": i + 1, "method": "tools/call",
+                        "params": {"name": "check_ip", "arguments": {"ipAddress": _address(i % args.unique_ips), "verbose": args.verbose}},
+                    },
+                )
+                if response.status_code != 200:
+                    return False
+                result = response.json().get("result") or {}
+                return not result.get("isError") and not result["content"][0]["text"].startswith("❌")
+
+            return await _drive(call, args.requests, args.concurrency)
+    finally:
+        process.terminate()
+        await asyncio.to_thread(process.wait)
+
+
+def _print(name: str, result: dict):
+    upstream = ", ".join(f"{endpoint} {count}" for endpoint, count in sorted(result["upstream_calls"].items())) or "none"
+    print(
+        f"{name:<10} {result['requests']:>6} req  c={result['concurrency']:<4} "
+        f"{result['throughput']:9.1f} req/s  p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+        f"p99 {result['p99_ms']:8.2f} ms  errors {result['error_rate']:6.2%}  upstream: {upstream}"
+    )
+
+
+def _regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    problems = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {result['p95_ms']:.2f} ms vs {before['p95_ms']:.2f} ms")
+        if result["throughput"] < before["throughput"] * (1 - tolerance):
+            problems.append(f"{name}: throughput {result['throughput']:.1f} vs {before['throughput']:.1f} req/s")
+    return problems
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--unique-ips", type=int, default=200, help="Size of the check_ip address pool")
+    parser.add_argument("--verbose", action="store_true", help="Request verbose check results")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub response delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub responses replaced by a 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of stub responses replaced by a 429")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for the http scenario")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results written earlier with --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against the baseline")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ABUSEIPDB_API_KEY", "benchmark")
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    results = {}
+    for scenario in scenarios:
+        stub = StubAPI(latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=1)
+        async with serve_stub(stub) as base_url:
+            if scenario == "http":
+                result = await _run_http(base_url, args)
+            else:
+                result = await _run_in_process(scenario, base_url, args)
+        result["upstream_calls"] = dict(stub.endpoint_calls)
+        result["injected"] = {"errors": stub.injected_errors, "throttles": stub.injected_throttles}
+        results[scenario] = result
+        _print(scenario, result)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        problems = _regressions(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
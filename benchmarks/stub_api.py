@@ -0,0 +1,285 @@
+"""Local stand-in for the AbuseIPDB v2 API used by the benchmarks.
+
+Run it on its own to point a server process at it:
+
+    python benchmarks/stub_api.py --port 8900 --latency 0.02 --error-rate 0.01
+    ABUSEIPDB_BASE_URL=http://127.0.0.1:8900/api/v2 mcp-abuseipdb -t http
+"""
+
+import argparse
+import asyncio
+import calendar
+import contextlib
+import csv
+import io
+import ipaddress
+import random
+import socket
+import time
+from typing import Iterable, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubAPI:
+    """Minimal /check, /reports, /check-block, /blacklist, /report and /bulk-report implementation with configurable latency.
+
+    When quota is set, every endpoint answers with X-RateLimit-* headers and
+    returns 429 with Retry-After once that many calls have been made with
+    the same API key. Keys in invalid_keys are answered with 401.
+    error_rate and throttle_rate inject random 503s and 429s (with
+    Retry-After and rate limit headers) into that share of responses.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        quota: Optional[int] = None,
+        reset_in: float = 3600.0,
+        blacklist_size: int = 10000,
+        verbose_reports: int = 50,
+        total_reports: int = 250,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: Optional[int] = None,
+        invalid_keys: Iterable[str] = (),
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.injected_errors = 0
+        self.injected_throttles = 0
+        self.blacklist_size = blacklist_size
+        self.verbose_reports = verbose_reports
+        self.total_reports = total_reports
+        self.quota = quota
+        self.reset_at = int(time.time() + reset_in)
+        self.calls = 0
+        self.endpoint_calls = {}
+        self.key_calls = {}
+        self.invalid_keys = set(invalid_keys)
+        self.bulk_rows = 0
+        self.app = Starlette(routes=[
+            Route("/api/v2/check", self.check, methods=["GET"]),
+            Route("/api/v2/reports", self.reports, methods=["GET"]),
+            Route("/api/v2/check-block", self.check_block, methods=["GET"]),
+            Route("/api/v2/blacklist", self.blacklist, methods=["GET"]),
+            Route("/api/v2/report", self.report, methods=["POST"]),
+            Route("/api/v2/bulk-report", self.bulk_report, methods=["POST"]),
+        ])
+
+    async def _handle(self, endpoint: str, request):
+        """Count the call, apply latency and return (rate limit headers, 401/429 response or None)."""
+        self.calls += 1
+        self.endpoint_calls[endpoint] = self.endpoint_calls.get(endpoint, 0) + 1
+        key = request.headers.get("Key", "")
+        used = self.key_calls[key, endpoint] = self.key_calls.get((key, endpoint), 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if key in self.invalid_keys:
+            return {}, JSONResponse({"errors": [{"detail": "Authentication failed. Your API key is either missing, incorrect, or revoked.", "status": 401}]}, status_code=401)
+
+        roll = self.random.random() if self.error_rate or self.throttle_rate else 1.0
+        if roll < self.throttle_rate:
+            self.injected_throttles += 1
+            headers = {
+                "Retry-After": "1",
+                "X-RateLimit-Limit": str(self.quota or 1000),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(int(time.time()) + 1),
+            }
+            detail = "Too many requests (injected by the benchmark stub)."
+            return headers, JSONResponse({"errors": [{"detail": detail, "status": 429}]}, status_code=429, headers=headers)
+        if roll < self.throttle_rate + self.error_rate:
+            self.injected_errors += 1
+            return {}, JSONResponse({"errors": [{"detail": "Service unavailable (injected)", "status": 503}]}, status_code=503)
+
+        if self.quota is None:
+            return {}, None
+
+        headers = {
+            "X-RateLimit-Limit": str(self.quota),
+            "X-RateLimit-Remaining": str(max(0, self.quota - used)),
+            "X-RateLimit-Reset": str(self.reset_at),
+        }
+        if used <= self.quota:
+            return headers, None
+
+        headers["Retry-After"] = str(max(0, int(self.reset_at - time.time())))
+        detail = f"Daily rate limit of {self.quota} requests exceeded for this endpoint. See headers for additional details."
+        return headers, JSONResponse({"errors": [{"detail": detail, "status": 429}]}, status_code=429, headers=headers)
+
+    async def check(self, request):
+        headers, limited = await self._handle("check", request)
+        if limited is not None:
+            return limited
+        ip_address = request.query_params.get("ipAddress", "")
+        data = {
+            "ipAddress": ip_address,
+            "isPublic": True,
+            "ipVersion": 6 if ":" in ip_address else 4,
+            "isWhitelisted": False,
+            "abuseConfidenceScore": 100,
+            "countryCode": "CN",
+            "usageType": "Data Center/Web Hosting/Transit",
+            "isp": "Tencent Cloud Computing (Beijing) Co. Ltd",
+            "domain": "tencent.com",
+            "hostnames": [],
+            "isTor": False,
+            "totalReports": 1,
+            "numDistinctUsers": 1,
+            "lastReportedAt": "2018-12-20T20:55:14+00:00",
+        }
+        if "verbose" in request.query_params:
+            data["reports"] = self.make_reports(self.verbose_reports)
+            data["totalReports"] = len(data["reports"])
+        return JSONResponse({"data": data}, headers=headers)
+
+    @staticmethod
+    def make_report(i: int, reported_at: str):
+        countries = ("US", "DE", "NL", "GB", "FR", "SG", "JP", "BR")
+        return {
+            "reportedAt": reported_at,
+            "comment": f"Failed SSH login attempt #{i}",
+            "categories": [18, 22] if i % 3 else [14, 15, 99],
+            "reporterId": i % 97,
+            "reporterCountryCode": countries[i % len(countries)],
+            "reporterCountryName": countries[i % len(countries)],
+        }
+
+    @classmethod
+    def make_reports(cls, count: int):
+        """Synthetic verbose reports spread over the 30 days before the last report."""
+        return [cls.make_report(i, f"2018-12-{20 - i % 30 // 2:02d}T{i % 24:02d}:{i % 60:02d}:00+00:00") for i in range(count)]
+
+    async def reports(self, request):
+        headers, limited = await self._handle("reports", request)
+        if limited is not None:
+            return limited
+        page = int(request.query_params.get("page", 1))
+        per_page = int(request.query_params.get("perPage", 25))
+        last_page = max(1, -(-self.total_reports // per_page))
+        start = (page - 1) * per_page
+        # One report per hour going back from the newest, like the real endpoint's newest-first order
+        newest = calendar.timegm((2018, 12, 20, 20, 0, 0))
+        results = [
+            self.make_report(i, time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(newest - i * 3600)))
+            for i in range(start, min(self.total_reports, start + per_page))
+        ]
+        return JSONResponse({
+            "data": {
+                "total": self.total_reports,
+                "page": page,
+                "count": len(results),
+                "perPage": per_page,
+                "lastPage": last_page,
+                "nextPageUrl": None if page >= last_page else f"{request.url.remove_query_params('page')}&page={page + 1}",
+                "previousPageUrl": None if page <= 1 else f"{request.url.remove_query_params('page')}&page={page - 1}",
+                "results": results,
+            }
+        }, headers=headers)
+
+    async def check_block(self, request):
+        headers, limited = await self._handle("check-block", request)
+        if limited is not None:
+            return limited
+        network = ipaddress.ip_network(request.query_params.get("network", ""), strict=False)
+        hosts = list(network.hosts())
+        reported = [
+            {
+                "ipAddress": str(address),
+                "numReports": 10 - i,
+                "mostRecentReport": "2018-12-20T20:55:14+00:00",
+                "abuseConfidenceScore": 100 - i * 10,
+                "countryCode": "CN",
+            }
+            for i, address in enumerate(hosts[:3])
+        ]
+        return JSONResponse({
+            "data": {
+                "networkAddress": str(network.network_address),
+                "netmask": str(network.netmask),
+                "minAddress": str(hosts[0]) if hosts else None,
+                "maxAddress": str(hosts[-1]) if hosts else None,
+                "numPossibleHosts": len(hosts),
+                "addressSpaceDesc": "Internet",
+                "reportedAddress": reported,
+            }
+        }, headers=headers)
+
+    async def blacklist(self, request):
+        headers, limited = await self._handle("blacklist", request)
+        if limited is not None:
+            return limited
+        limit = min(self.blacklist_size, int(request.query_params.get("limit", self.blacklist_size)))
+
+        async def chunks():
+            # Mostly 45.0.0.0/8 addresses with every 100th one IPv6, sent in 1,000-line chunks
+            for start in range(0, limit, 1000):
+                yield "".join(
+                    f"45.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}\n" if i % 100 else f"2001:db8::{i >> 16:x}:{i & 0xffff:x}\n"
+                    for i in range(start, min(limit, start + 1000))
+                )
+
+        return StreamingResponse(chunks(), media_type="text/plain", headers=headers)
+
+    async def report(self, request):
+        headers, limited = await self._handle("report", request)
+        if limited is not None:
+            return limited
+        form = await request.form()
+        return JSONResponse({"data": {"ipAddress": form.get("ip"), "abuseConfidenceScore": 52}}, headers=headers)
+
+    async def bulk_report(self, request):
+        headers, limited = await self._handle("bulk-report", request)
+        if limited is not None:
+            return limited
+        form = await request.form()
+        rows = list(csv.DictReader(io.StringIO((await form["csv"].read()).decode("utf-8"))))
+        self.bulk_rows += len(rows)
+        return JSONResponse({"data": {"savedReports": len(rows), "invalidReports": []}}, headers=headers)
+
+
+@contextlib.asynccontextmanager
+async def serve_stub(stub: StubAPI, host: str = "127.0.0.1"):
+    """Run the stub on a free local port and yield its base URL."""
+    port = _free_port()
+    config = uvicorn.Config(stub.app, host=host, port=port, log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}/api/v2"
+    finally:
+        server.should_exit = True
+        await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay in seconds")
+    parser.add_argument("--quota", type=int, default=None, help="Calls per API key and endpoint before answering 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of responses replaced by a 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of responses replaced by a 429")
+    args = parser.parse_args()
+
+    stub = StubAPI(latency=args.latency, quota=args.quota, error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+    print(f"AbuseIPDB stub listening on http://{args.host}:{args.port}/api/v2")
+    uvicorn.run(stub.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import heapq
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+class ReportAggregator:
+    """One-pass summary of the individual reports in a verbose check result.
+
+    Each report is folded into counters (categories, reporter countries,
+    reports per day) and a bounded heap of the most recent reports, so an IP
+    with thousands of reports is summarized in O(n log keep_recent) time
+    without keeping every report around.
+    """
+
+    def __init__(self, keep_recent: int = 25):
+        self.keep_recent = keep_recent
+        self.total = 0
+        self.categories: Counter = Counter()
+        self.countries: Counter = Counter()
+        self.days: Counter = Counter()
+        self.reporters = set()
+        self.first_seen: Optional[str] = None
+        self.last_seen: Optional[str] = None
+        self._recent: List[Tuple[str, int, Dict[str, Any]]] = []
+
+    def add(self, report: Mapping[str, Any]):
+        self.total += 1
+        self.categories.update(report.get("categories") or ())
+        country = report.get("reporterCountryCode")
+        if country:
+            self.countries[country] += 1
+        reporter = report.get("reporterId")
+        if reporter is not None:
+            self.reporters.add(reporter)
+
+        # AbuseIPDB timestamps are ISO 8601 in UTC, so they order correctly as strings
+        reported_at = report.get("reportedAt") or ""
+        if reported_at:
+            self.days[reported_at[:10]] += 1
+            if self.first_seen is None or reported_at < self.first_seen:
+                self.first_seen = reported_at
+            if self.last_seen is None or reported_at > self.last_seen:
+                self.last_seen = reported_at
+
+        if self.keep_recent > 0:
+            item = (reported_at, self.total, report)
+            if len(self._recent) < self.keep_recent:
+                heapq.heappush(self._recent, item)
+            elif item > self._recent[0]:
+                heapq.heapreplace(self._recent, item)
+
+    def extend(self, reports: Iterable[Mapping[str, Any]]) -> "ReportAggregator":
+        for report in reports:
+            self.add(report)
+        return self
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """The kept reports, newest first."""
+        return [report for _, _, report in sorted(self._recent, reverse=True)]
+
+    def summary(self, category_names: Mapping[int, str], top_countries: int = 10) -> Dict[str, Any]:
+        """Plain-JSON summary suitable for caching alongside the check result."""
+        reports_per_day = None
+        if self.first_seen and self.last_seen:
+            try:
+                span = datetime.fromisoformat(self.last_seen) - datetime.fromisoformat(self.first_seen)
+                reports_per_day = round(self.total / (span.days + 1), 2)
+            except ValueError:
+                pass
+        peak = self.days.most_common(1)
+        return {
+            "totalReports": self.total,
+            "distinctReporters": len(self.reporters),
+            "firstSeen": self.first_seen,
+            "lastSeen": self.last_seen,
+            "reportsPerDay": reports_per_day,
+            "peakDay": {"date": peak[0][0], "reports": peak[0][1]} if peak else None,
+            "categories": [
+                {"id": category_id, "name": category_names.get(category_id, str(category_id)), "count": count}
+                for category_id, count in self.categories.most_common()
+            ],
+            "reporterCountries": [
+                {"countryCode": country, "count": count} for country, count in self.countries.most_common(top_countries)
+            ],
+        }
@@ -0,0 +1,117 @@
+import ipaddress
+import os
+import socket
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional
+
+# Snapshot files: this header (magic, confidence minimum, fetch time, IPv4 and IPv6 counts)
+# followed by the sorted addresses as big-endian 4- and 16-byte integers
+SNAPSHOT_MAGIC = b"ABUSEIPDB-BLIST\x01"
+_HEADER = struct.Struct(">16sBdII")
+
+
+class BlacklistSnapshot:
+    """Immutable in-memory index of the AbuseIPDB blacklist.
+
+    IPv4 addresses are kept as a sorted array of unsigned 32-bit integers
+    (4 bytes per entry) and IPv6 addresses as a sorted list of 128-bit
+    integers; membership is a binary search. Every listed address had an
+    abuse confidence score of at least confidence_minimum when downloaded.
+    """
+
+    def __init__(self, ipv4: array, ipv6: List[int], confidence_minimum: int, fetched_at: float):
+        self._ipv4 = ipv4
+        self._ipv6 = ipv6
+        self.confidence_minimum = confidence_minimum
+        self.fetched_at = fetched_at
+
+    def __len__(self) -> int:
+        return len(self._ipv4) + len(self._ipv6)
+
+    def __contains__(self, ip_address: str) -> bool:
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return False
+        values = self._ipv4 if address.version == 4 else self._ipv6
+        value = int(address)
+        index = bisect_left(values, value)
+        return index < len(values) and values[index] == value
+
+    def addresses(self) -> Iterator[str]:
+        """Listed addresses as strings, IPv4 first."""
+        for value in self._ipv4:
+            yield str(ipaddress.IPv4Address(value))
+        for value in self._ipv6:
+            yield str(ipaddress.IPv6Address(value))
+
+    def save(self, path: str):
+        """Write the snapshot to path atomically (a temporary file renamed into place)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        ipv4 = array("I", self._ipv4)
+        if sys.byteorder == "little":
+            ipv4.byteswap()
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(_HEADER.pack(SNAPSHOT_MAGIC, self.confidence_minimum, self.fetched_at, len(self._ipv4), len(self._ipv6)))
+            handle.write(ipv4.tobytes())
+            handle.write(b"".join(value.to_bytes(16, "big") for value in self._ipv6))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BlacklistSnapshot":
+        """Read a snapshot written by save(); raises ValueError for anything else."""
+        with open(path, "rb") as handle:
+            header = handle.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a blacklist snapshot")
+            _, confidence_minimum, fetched_at, ipv4_count, ipv6_count = _HEADER.unpack(header)
+            ipv4 = array("I")
+            ipv4.frombytes(handle.read(ipv4_count * 4))
+            packed = handle.read(ipv6_count * 16)
+        if len(ipv4) != ipv4_count or len(packed) != ipv6_count * 16:
+            raise ValueError(f"{path}: truncated blacklist snapshot")
+        if sys.byteorder == "little":
+            ipv4.byteswap()
+        ipv6 = [int.from_bytes(packed[i:i + 16], "big") for i in range(0, len(packed), 16)]
+        return cls(ipv4, ipv6, confidence_minimum, fetched_at)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], confidence_minimum: int, fetched_at: Optional[float] = None) -> "BlacklistSnapshot":
+        """Build a snapshot from plaintext blacklist lines (one address per line)."""
+        builder = BlacklistBuilder()
+        for line in lines:
+            builder.add(line)
+        return builder.build(confidence_minimum, fetched_at)
+
+
+class BlacklistBuilder:
+    """Incrementally collects streamed blacklist lines into a snapshot."""
+
+    def __init__(self):
+        self._ipv4 = array("I")
+        self._ipv6: List[int] = []
+        self.skipped = 0
+
+    def add(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            if ":" in line:
+                self._ipv6.append(int.from_bytes(socket.inet_pton(socket.AF_INET6, line), "big"))
+            else:
+                self._ipv4.append(int.from_bytes(socket.inet_pton(socket.AF_INET, line), "big"))
+        except OSError:
+            self.skipped += 1
+
+    def build(self, confidence_minimum: int, fetched_at: Optional[float] = None) -> BlacklistSnapshot:
+        ipv4 = array("I", sorted(set(self._ipv4)))
+        ipv6 = sorted(set(self._ipv6))
+        return BlacklistSnapshot(ipv4, ipv6, confidence_minimum, fetched_at if fetched_at is not None else time.time())
@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import io
+import json
+import math
+import os
+import struct
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .blacklist import BlacklistSnapshot
+from .cache import CacheEntry
+from .store import SQLiteCacheBackend
+
+Record = Tuple[str, CacheEntry]
+
+BUNDLE_FORMATS = ("binary", "jsonl")
+
+# First line of a JSONL bundle; every following line is one cache entry
+JSONL_HEADER = {"format": "abuseipdb-mcp-cache", "version": 1}
+
+# Binary bundles are a gzip stream of this magic followed by framed records:
+# stored_at, expires_at, negative flag, key length, value length, key, JSON value
+BINARY_MAGIC = b"ABUSEIPDB-CACHE\x01"
+_RECORD = struct.Struct(">ddBII")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# Reserved record key carrying the blacklist snapshot; its value lists the addresses
+BLACKLIST_KEY = "blacklist"
+
+
+def bundle_format(path: str, fmt: Optional[str] = None) -> str:
+    """The explicit format, else 'jsonl' for .jsonl/.jsonl.gz names and 'binary' for anything else."""
+    if fmt:
+        if fmt not in BUNDLE_FORMATS:
+            raise ValueError(f"Unknown bundle format '{fmt}'. Supported: {', '.join(BUNDLE_FORMATS)}")
+        return fmt
+    name = path[:-3] if path.endswith(".gz") else path
+    return "jsonl" if name.endswith(".jsonl") else "binary"
+
+
+def write_bundle(path: str, records: Iterable[Record], fmt: str = "binary") -> int:
+    """Stream records into a bundle file and return how many were written.
+
+    Binary bundles are always gzip-compressed; JSONL bundles are when the
+    file name ends in .gz.
+    """
+    count = 0
+    if fmt == "jsonl":
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as handle:
+            handle.write(json.dumps(JSONL_HEADER) + "\n")
+            for key, entry in records:
+                handle.write(json.dumps({
+                    "key": key,
+                    "value": entry.value,
+                    "storedAt": entry.stored_at,
+                    # Strict JSON has no Infinity; null means the entry never expires
+                    "expiresAt": None if math.isinf(entry.expires_at) else entry.expires_at,
+                    "negative": entry.negative,
+                }, separators=(",", ":"), ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    with gzip.open(path, "wb") as handle:
+        handle.write(BINARY_MAGIC)
+        for key, entry in records:
+            key_bytes = key.encode("utf-8")
+            value_bytes = json.dumps(entry.value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            handle.write(_RECORD.pack(entry.stored_at, entry.expires_at, entry.negative, len(key_bytes), len(value_bytes)))
+            handle.write(key_bytes)
+            handle.write(value_bytes)
+            count += 1
+    return count
+
+
+def read_bundle(path: str) -> Iterator[Record]:
+    """Stream the records of a bundle written by write_bundle, detecting its format from the content."""
+    with open(path, "rb") as raw:
+        compressed = raw.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+    with (gzip.open(path, "rb") if compressed else open(path, "rb")) as handle:
+        head = handle.read(len(BINARY_MAGIC))
+        if head == BINARY_MAGIC:
+            yield from _read_binary(handle)
+        else:
+            handle.seek(0)
+            yield from _read_jsonl(io.TextIOWrapper(handle, encoding="utf-8"))
+
+
+def _read_binary(handle) -> Iterator[Record]:
+    while True:
+        header = handle.read(_RECORD.size)
+        if not header:
+            return
+        if len(header) < _RECORD.size:
+            raise ValueError("Truncated cache bundle")
+        stored_at, expires_at, negative, key_length, value_length = _RECORD.unpack(header)
+        key = handle.read(key_length)
+        value = handle.read(value_length)
+        if len(key) < key_length or len(value) < value_length:
+            raise ValueError("Truncated cache bundle")
+        entry = CacheEntry(value=json.loads(value), stored_at=stored_at, expires_at=expires_at, negative=bool(negative))
+        yield key.decode("utf-8"), entry
+
+
+def _read_jsonl(lines: Iterable[str]) -> Iterator[Record]:
+    lines = iter(lines)
+    try:
+        header = json.loads(next(lines))
+    except (StopIteration, ValueError):
+        header = None
+    if not isinstance(header, dict) or header.get("format") != JSONL_HEADER["format"]:
+        raise ValueError("Not a cache bundle")
+    for number, line in enumerate(lines, start=2):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            expires_at = float("inf") if row["expiresAt"] is None else row["expiresAt"]
+            entry = CacheEntry(value=row["value"], stored_at=row["storedAt"], expires_at=expires_at, negative=bool(row.get("negative")))
+        except (ValueError, KeyError) as error:
+            raise ValueError(f"Invalid cache bundle line {number}: {error}") from None
+        yield row["key"], entry
+
+
+def _blacklist_record(snapshot: BlacklistSnapshot) -> Record:
+    value = {"confidenceMinimum": snapshot.confidence_minimum, "addresses": list(snapshot.addresses())}
+    return BLACKLIST_KEY, CacheEntry(value=value, stored_at=snapshot.fetched_at, expires_at=float("inf"))
+
+
+def _save_blacklist(entry: CacheEntry, blacklist_path: str) -> Optional[int]:
+    """Write a bundled snapshot to blacklist_path unless the snapshot already there is newer."""
+    if os.path.exists(blacklist_path):
+        try:
+            if BlacklistSnapshot.load(blacklist_path).fetched_at >= entry.stored_at:
+                return None
+        except ValueError:
+            pass
+    snapshot = BlacklistSnapshot.from_lines(entry.value["addresses"], entry.value["confidenceMinimum"], entry.stored_at)
+    snapshot.save(blacklist_path)
+    return len(snapshot)
+
+
+async def export_cache(
+    cache_path: str, path: str, fmt: Optional[str] = None, include_expired: bool = False, blacklist_path: Optional[str] = None
+) -> Tuple[int, Optional[int]]:
+    """Write the SQLite cache at cache_path, plus the blacklist snapshot at blacklist_path if saved, to a bundle.
+
+    Returns the number of cache entries and of blacklisted addresses (None without a snapshot).
+    """
+    has_blacklist = bool(blacklist_path) and os.path.exists(blacklist_path)
+    has_cache = os.path.exists(cache_path)
+    if not has_cache and not has_blacklist:
+        raise FileNotFoundError(f"No persistent cache at {cache_path}")
+    fmt = bundle_format(path, fmt)
+    snapshot = await asyncio.to_thread(BlacklistSnapshot.load, blacklist_path) if has_blacklist else None
+    store = SQLiteCacheBackend(cache_path, compact_interval=0) if has_cache else None
+
+    def records() -> Iterator[Record]:
+        if store is not None:
+            yield from store.iter_entries(include_expired)
+        if snapshot is not None:
+            yield _blacklist_record(snapshot)
+
+    try:
+        written = await asyncio.to_thread(write_bundle, path, records(), fmt)
+    finally:
+        if store is not None:
+            await store.close()
+    if snapshot is None:
+        return written, None
+    return written - 1, len(snapshot)
+
+
+async def import_cache(
+    cache_path: str, path: str, skip_expired: bool = False, blacklist_path: Optional[str] = None
+) -> Tuple[int, Optional[int]]:
+    """Merge a bundle into the SQLite cache at cache_path (newer entries win).
+
+    A bundled blacklist snapshot is written to blacklist_path when it is newer
+    than the one there. Returns the number of cache entries read and of
+    blacklisted addresses saved (None when no snapshot was saved).
+    """
+    store = SQLiteCacheBackend(cache_path, compact_interval=0)
+    now = time.time()
+    snapshots: List[CacheEntry] = []
+
+    def records() -> Iterator[Record]:
+        for key, entry in read_bundle(path):
+            if key == BLACKLIST_KEY:
+                snapshots.append(entry)
+            elif not skip_expired or entry.expires_at > now:
+                yield key, entry
+
+    try:
+        count = await asyncio.to_thread(store.put_entries, records())
+    finally:
+        await store.close()
+    blacklisted = None
+    if snapshots and blacklist_path:
+        blacklisted = await asyncio.to_thread(_save_blacklist, snapshots[-1], blacklist_path)
+    return count, blacklisted
@@ -0,0 +1,242 @@
+import heapq
+import ipaddress
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class CacheEntry:
+    """A cached API result with the time it was fetched."""
+    value: Any
+    stored_at: float
+    expires_at: float
+    negative: bool = False
+
+    def age(self, now: float) -> float:
+        return max(0.0, now - self.stored_at)
+
+    def is_stale(self, now: float) -> bool:
+        return self.expires_at <= now
+
+
+class ResponseCache:
+    """Bounded in-memory cache with per-entry TTL and LRU eviction.
+
+    Positive entries are kept for stale_ttl seconds past expiry so callers
+    can opt in to serving them while a fresh copy is fetched.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        stale_ttl: float = 0.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard_at(self, entry: CacheEntry) -> float:
+        return entry.expires_at if entry.negative else entry.expires_at + self.stale_ttl
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """Return the live entry for key (refreshing its LRU position) or None.
+
+        With allow_stale, an expired positive entry still inside the stale
+        window is returned as well; check it with CacheEntry.is_stale.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        now = self.clock()
+        if entry.expires_at <= now:
+            if self._discard_at(entry) <= now:
+                del self._entries[key]
+                self.expirations += 1
+            elif allow_stale:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return entry
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the stored entry for key, fresh or stale, without touching LRU order or stats."""
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, value: Any, negative: bool = False) -> Optional[CacheEntry]:
+        """Store value under key, evicting the least recently used entries if full."""
+        if not self.enabled:
+            return None
+        ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return None
+        now = self.clock()
+        entry = CacheEntry(value=value, stored_at=now, expires_at=now + ttl, negative=negative)
+        self.put_entry(key, entry)
+        return entry
+
+    def put_entry(self, key: Hashable, entry: CacheEntry):
+        """Insert an existing entry (e.g. loaded from a persistent store) keeping its timestamps."""
+        if not self.enabled or self._discard_at(entry) <= self.clock():
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class AccessTracker:
+    """Decaying access counts per key, used to find the hottest cache entries.
+
+    Counts are multiplied by decay on every decay() call so keys that stop
+    being requested fall out of the top-N; the table is pruned to max_keys.
+    """
+
+    def __init__(self, max_keys: int = 4096, decay: float = 0.5):
+        self.max_keys = max_keys
+        self.decay_factor = decay
+        self._counts: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def record(self, key: Hashable):
+        self._counts[key] = self._counts.get(key, 0.0) + 1.0
+        if len(self._counts) > 2 * self.max_keys:
+            self._prune()
+
+    def top(self, n: int) -> List[Hashable]:
+        """Return up to n keys, most accessed first."""
+        return heapq.nlargest(n, self._counts, key=self._counts.__getitem__)
+
+    def decay(self):
+        factor = self.decay_factor
+        # Forget keys whose weight has decayed below a single recent access
+        self._counts = {key: count * factor for key, count in self._counts.items() if count * factor >= 0.25}
+        if len(self._counts) > self.max_keys:
+            self._prune()
+
+    def _prune(self):
+        self._counts = dict(heapq.nlargest(self.max_keys, self._counts.items(), key=lambda item: item[1]))
+
+
+class NetworkBlockCache:
+    """Recent check-block results, indexed so single addresses inside them can be answered locally."""
+
+    def __init__(self, max_blocks: int = 64, ttl: float = 3600.0, clock: Callable[[], float] = time.time):
+        self.max_blocks = max_blocks
+        self.ttl = ttl
+        self.clock = clock
+        # (network, maxAgeInDays) -> (network object, entry, reported rows keyed by normalized IP)
+        self._blocks: "OrderedDict[Tuple[str, str], Tuple[Any, CacheEntry, Dict[str, Dict[str, Any]]]]" = OrderedDict()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def get(self, network: str, max_age_in_days: str) -> Optional[CacheEntry]:
+        """Return the cached check-block response for a network, if still fresh."""
+        key = (network, max_age_in_days)
+        block = self._blocks.get(key)
+        if block is None:
+            return None
+        if block[1].expires_at <= self.clock():
+            del self._blocks[key]
+            return None
+        self._blocks.move_to_end(key)
+        self.hits += 1
+        return block[1]
+
+    def set(self, network: str, max_age_in_days: str, data: Dict[str, Any]) -> Optional[CacheEntry]:
+        if self.max_blocks <= 0 or self.ttl <= 0:
+            return None
+        now = self.clock()
+        entry = CacheEntry(value=data, stored_at=now, expires_at=now + self.ttl)
+        reported = {}
+        for row in data.get("data", {}).get("reportedAddress") or []:
+            try:
+                reported[str(ipaddress.ip_address(row["ipAddress"]))] = row
+            except (KeyError, ValueError):
+                continue
+        key = (network, max_age_in_days)
+        self._blocks[key] = (ipaddress.ip_network(network, strict=False), entry, reported)
+        self._blocks.move_to_end(key)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return entry
+
+    def find(self, ip_address: str, max_age_in_days: str) -> Optional[Tuple[str, CacheEntry, Optional[Dict[str, Any]]]]:
+        """Find the most specific fresh block containing ip_address.
+
+        Returns (network, block entry, reported row or None if the address
+        had no reports in that block).
+        """
+        address = ipaddress.ip_address(ip_address)
+        now = self.clock()
+        best = None
+        for (network, max_age), (net, entry, reported) in self._blocks.items():
+            if max_age != max_age_in_days or entry.expires_at <= now or address.version != net.version:
+                continue
+            if address in net and (best is None or net.prefixlen > best[0].prefixlen):
+                best = (net, network, entry, reported)
+        if best is None:
+            return None
+        self.hits += 1
+        net, network, entry, reported = best
+        return network, entry, reported.get(str(address))
+
+
+def format_age(seconds: float) -> str:
+    """Render a cache age as a short human readable duration."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
@@ -0,0 +1,209 @@
+import csv
+import ipaddress
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Enrichment fields and the CSV column names accepted for each (GeoLite2 CSV names included)
+CSV_COLUMNS = {
+    "asn": ("asn", "autonomous_system_number"),
+    "asOrganization": ("as_organization", "as_org", "autonomous_system_organization", "organization"),
+    "countryCode": ("country_code", "country_iso_code", "iso_code"),
+    "countryName": ("country_name",),
+}
+
+# Check result fields filled from enrichment when the upstream response lacks them
+FILLABLE_FIELDS = {"countryCode": "countryCode", "countryName": "countryName", "isp": "asOrganization"}
+
+
+class MaxMindDatabase:
+    """Memory-mapped MaxMind DB (.mmdb) file: GeoLite2/GeoIP2 ASN, Country or City.
+
+    Needs the optional maxminddb package. The file is mapped once, so its pages
+    are shared by all requests and, through the OS page cache, by every
+    worker process.
+    """
+
+    def __init__(self, path: str):
+        try:
+            import maxminddb
+        except ImportError:
+            raise ValueError(f"{path}: .mmdb databases require the 'maxminddb' package") from None
+        self.path = path
+        self._reader = maxminddb.open_database(path, maxminddb.MODE_MMAP)
+
+    def lookup(self, ip_address: str) -> Dict[str, Any]:
+        record = self._reader.get(ip_address)
+        if not record:
+            return {}
+        fields: Dict[str, Any] = {}
+        if record.get("autonomous_system_number") is not None:
+            fields["asn"] = record["autonomous_system_number"]
+        if record.get("autonomous_system_organization"):
+            fields["asOrganization"] = record["autonomous_system_organization"]
+        country = record.get("country") or record.get("registered_country") or {}
+        if country.get("iso_code"):
+            fields["countryCode"] = country["iso_code"]
+        if (country.get("names") or {}).get("en"):
+            fields["countryName"] = country["names"]["en"]
+        return fields
+
+    def close(self):
+        self._reader.close()
+
+
+class CsvRangeDatabase:
+    """ASN/geo ranges from a CSV file, indexed as sorted start addresses for binary search.
+
+    Rows give either a ``network`` in CIDR notation or ``start``/``end``
+    addresses, plus any of the columns in CSV_COLUMNS (so a GeoLite2 ASN CSV
+    works as-is). Ranges must not overlap.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._starts = {4: array("I"), 6: []}
+        self._ends = {4: array("I"), 6: []}
+        self._records: Dict[int, List[Dict[str, Any]]] = {4: [], 6: []}
+        rows = []
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                parsed = self._parse_row({key.strip().lower(): (value or "").strip() for key, value in row.items() if key})
+                if parsed is not None:
+                    rows.append(parsed)
+        rows.sort(key=lambda row: (row[0], row[1]))
+        for version, start, end, record in rows:
+            self._starts[version].append(start)
+            self._ends[version].append(end)
+            self._records[version].append(record)
+
+    @staticmethod
+    def _parse_row(row: Dict[str, str]):
+        try:
+            if row.get("network"):
+                network = ipaddress.ip_network(row["network"], strict=False)
+                version, start, end = network.version, int(network.network_address), int(network.broadcast_address)
+            else:
+                first, last = ipaddress.ip_address(row["start"]), ipaddress.ip_address(row["end"])
+                version, start, end = first.version, int(first), int(last)
+        except (KeyError, ValueError):
+            return None
+        record: Dict[str, Any] = {}
+        for field, columns in CSV_COLUMNS.items():
+            value = next((row[column] for column in columns if row.get(column)), None)
+            if value and field == "asn":
+                # "13335" or "AS13335"
+                digits = value.upper().removeprefix("AS")
+                value = int(digits) if digits.isdigit() else None
+            if value:
+                record[field] = value
+        return version, start, end, record
+
+    def lookup(self, ip_address: str) -> Dict[str, Any]:
+        address = ipaddress.ip_address(ip_address)
+        value = int(address)
+        index = bisect_right(self._starts[address.version], value) - 1
+        if index >= 0 and value <= self._ends[address.version][index]:
+            return self._records[address.version][index]
+        return {}
+
+    def close(self):
+        pass
+
+
+def open_database(path: str):
+    return MaxMindDatabase(path) if path.endswith(".mmdb") else CsvRangeDatabase(path)
+
+
+class Enricher:
+    """Merge lookups from local ASN/geo databases into check results.
+
+    Databases are opened once by load(), which the server runs in a thread
+    at startup, and shared by all requests; until it finishes, results pass
+    through unenriched rather than waiting on the event loop. Earlier
+    databases win when several know a field. Lookups are memoized, so
+    enriching the same address again costs a dict lookup. A database that
+    fails to open is logged and skipped.
+    """
+
+    def __init__(self, paths: Sequence[str], cache_size: int = 65536):
+        self.paths = list(paths)
+        self._databases: Optional[List[Any]] = None
+        self._lock = threading.Lock()
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.paths)
+
+    @property
+    def loaded(self) -> bool:
+        return self._databases is not None
+
+    def load(self) -> List[Any]:
+        """Open the databases once; blocking (a large CSV takes a moment), so run it in a thread."""
+        with self._lock:
+            if self._databases is None:
+                databases = []
+                for path in self.paths:
+                    try:
+                        databases.append(open_database(path))
+                    except (OSError, ValueError) as error:
+                        logger.warning(f"Enrichment database {path} not loaded: {error}")
+                self._databases = databases
+        return self._databases
+
+    def _lookup(self, ip_address: str) -> Dict[str, Any]:
+        fields: Dict[str, Any] = {}
+        for database in self._databases or ():
+            try:
+                found = database.lookup(ip_address)
+            except ValueError:
+                continue
+            for field, value in found.items():
+                fields.setdefault(field, value)
+        return fields
+
+    def enrich(self, ip_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return ip_data with missing country/ISP fields filled and ASN fields added.
+
+        The input is not modified (it may be a cached value); the names of the
+        filled-in fields are listed under ``enrichedFields``.
+        """
+        if not self.enabled or not ip_data.get("ipAddress") or ip_data.get("isPublic") is False:
+            return ip_data
+        if not self.loaded:
+            # Still loading in the background; never block the event loop on it
+            return ip_data
+        found = self.lookup(ip_data["ipAddress"])
+        if not found:
+            return ip_data
+        enriched = dict(ip_data)
+        filled = []
+        for field, source in FILLABLE_FIELDS.items():
+            if not enriched.get(field) and found.get(source):
+                enriched[field] = found[source]
+                filled.append(field)
+        if "countryName" in filled and found.get("countryCode") not in (None, enriched.get("countryCode")):
+            # Don't pair a local country name with a different upstream country code
+            del enriched["countryName"]
+            filled.remove("countryName")
+        for field in ("asn", "asOrganization"):
+            if field in found and enriched.get(field) is None:
+                enriched[field] = found[field]
+                filled.append(field)
+        if filled:
+            enriched["enrichedFields"] = filled
+        return enriched
+
+    def close(self):
+        with self._lock:
+            for database in self._databases or ():
+                database.close()
+            self._databases = None
+        self.lookup.cache_clear()
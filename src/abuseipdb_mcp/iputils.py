@@ -0,0 +1,91 @@
+import ipaddress
+import re
+from functools import lru_cache
+from typing import Iterator, Optional
+
+# Canonical dotted-quad IPv4: no leading zeros, each octet 0-255
+_IPV4_OCTET = r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+_IPV4 = rf"{_IPV4_OCTET}(?:\.{_IPV4_OCTET}){{3}}"
+IPV4_PATTERN = re.compile(_IPV4)
+
+# Address candidates in free text such as log lines: colon-separated hex groups (IPv6,
+# optionally with an IPv4 tail) or a dotted quad, not glued to neighbouring words.
+# An IPv6 candidate ends in a hex group, an IPv4 tail or "::", so a trailing ":" or
+# "." in prose ("from 2001:db8::5: 11: Bye", "from 2600:1f18::1.") is left out.
+# The leading lookahead lets the engine skip positions that cannot start an address.
+# Candidates are confirmed by normalize_ip, which discards look-alikes such as the
+# "10:30:00" of a timestamp or a MAC address.
+IP_SCANNER = re.compile(
+    rf"(?<![\w.])(?=[0-9A-Fa-f:])(?:"
+    rf"(?<!:)(?:[0-9A-Fa-f]{{0,4}}:){{2,7}}(?:{_IPV4}|[0-9A-Fa-f]{{1,4}}|(?<=::))(?!\w|:[0-9A-Fa-f:]|\.\d)"
+    rf"|{_IPV4}(?!\w|\.\d))"
+)
+
+# Checked in order; the first matching property names the scope of a non-public address
+_NON_PUBLIC_SCOPES = (
+    ("is_unspecified", "unspecified"),
+    ("is_loopback", "loopback"),
+    ("is_link_local", "link-local"),
+    ("is_multicast", "multicast"),
+    ("is_private", "private"),
+    ("is_reserved", "reserved"),
+)
+
+
+def normalize_ip(value: str) -> Optional[str]:
+    """Return the canonical text form of an IP address, or None if it is not one.
+
+    Plain dotted-quad IPv4 (the common case in logs) is validated with one
+    precompiled pattern, without constructing an address object. Everything
+    else goes through ipaddress (memoized):
+    IPv6 is compressed and lower-cased, brackets ('[2001:db8::1]') and zone
+    IDs ('fe80::1%eth0') are stripped, and IPv4-mapped IPv6
+    ('::ffff:192.0.2.1') collapses to the IPv4 address, so one address has
+    exactly one cache key.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    text = value.strip()
+    if IPV4_PATTERN.fullmatch(text):
+        return text
+    return _normalize_with_ipaddress(text)
+
+
+def extract_ips(text: str) -> Iterator[str]:
+    """Yield every IP address in text (e.g. one log line), normalized, in order of appearance."""
+    for candidate in IP_SCANNER.findall(text):
+        ip = normalize_ip(candidate)
+        if ip is not None:
+            yield ip
+
+
+@lru_cache(maxsize=65536)
+def _normalize_with_ipaddress(text: str) -> Optional[str]:
+    if not text.isascii():
+        return None
+    if text.startswith("[") and text.endswith("]"):
+        text = text[1:-1]
+    text = text.split("%", 1)[0]
+    try:
+        address = ipaddress.ip_address(text)
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return str(address)
+
+
+@lru_cache(maxsize=65536)
+def non_public_scope(ip: str) -> Optional[str]:
+    """Name the scope of a normalized address that is not publicly routable, else None.
+
+    AbuseIPDB never holds reports for these, so they can be answered locally
+    without spending quota.
+    """
+    address = ipaddress.ip_address(ip)
+    for attribute, scope in _NON_PUBLIC_SCOPES:
+        if getattr(address, attribute):
+            return scope
+    if not address.is_global:
+        return "non-public"
+    return None
@@ -0,0 +1,145 @@
+import hashlib
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from .ratelimit import LocalRateLimitError, QuotaRateLimiter
+
+
+class ApiKey:
+    """One AbuseIPDB API key with its own per-endpoint quota budgets and usage counters."""
+
+    def __init__(self, value: str, index: int, limiter: QuotaRateLimiter):
+        self.value = value
+        self.index = index
+        self.limiter = limiter
+        self.calls: Counter = Counter()
+        self.disabled_until = 0.0
+        self.disabled_reason: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Identifies the key in logs and metrics without revealing it."""
+        return f"#{self.index} …{self.value[-4:]}"
+
+    @staticmethod
+    def fingerprint(value: str) -> str:
+        return hashlib.sha256(value.encode("utf-8")).hexdigest()[:12]
+
+    def disabled(self, now: float) -> bool:
+        return now < self.disabled_until
+
+    def available(self, endpoint: str, now: float) -> bool:
+        remaining = self.limiter.remaining(endpoint)
+        return not self.disabled(now) and (remaining is None or remaining > 0)
+
+
+class ApiKeyPool:
+    """Spread requests over several API keys by remaining quota.
+
+    Each key has its own QuotaRateLimiter, so budgets are learned per key
+    from X-RateLimit-* headers. acquire() picks the available key with the
+    most requests left for the endpoint (keys not yet seen count as full, so
+    every key gets probed), falling through to the next key when one is
+    exhausted or paced out. A key answering 401 is disabled for
+    disable_seconds; a 429 zeroes its budget until the reset.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        limiter_factory: Callable[[str], QuotaRateLimiter],
+        disable_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.keys = [ApiKey(value, index, limiter_factory(value)) for index, value in enumerate(keys, start=1)]
+        self.disable_seconds = disable_seconds
+        self.clock = clock
+        self.failovers = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _candidates(self, endpoint: str) -> List[ApiKey]:
+        now = self.clock()
+        candidates = [key for key in self.keys if key.available(endpoint, now)]
+
+        def left(key: ApiKey) -> float:
+            remaining = key.limiter.remaining(endpoint)
+            return float("inf") if remaining is None else remaining
+
+        # Most quota left first; equal budgets alternate by how often each key was used
+        candidates.sort(key=lambda key: (-left(key), key.calls[endpoint]))
+        return candidates
+
+    async def acquire(self, endpoint: str) -> ApiKey:
+        """Reserve a request slot on the best key for endpoint."""
+        last_error: Optional[LocalRateLimitError] = None
+        for key in self._candidates(endpoint):
+            try:
+                await key.limiter.acquire(endpoint)
+            except LocalRateLimitError as error:
+                last_error = error
+                continue
+            key.calls[endpoint] += 1
+            return key
+        if last_error is not None:
+            raise last_error
+        raise LocalRateLimitError(endpoint, self._unavailable_message(endpoint), self._next_available_in(endpoint))
+
+    def observe(self, key: ApiKey, endpoint: str, status: int, headers: Mapping[str, str]):
+        key.limiter.observe(endpoint, status, headers)
+        if status == 401:
+            key.disabled_until = self.clock() + self.disable_seconds
+            key.disabled_reason = "401 Unauthorized"
+
+    def can_fail_over(self, key: ApiKey, endpoint: str) -> bool:
+        """Whether another key could serve endpoint right now."""
+        now = self.clock()
+        return any(other is not key and other.available(endpoint, now) for other in self.keys)
+
+    def _next_available_in(self, endpoint: str) -> Optional[float]:
+        now = self.clock()
+        waits = []
+        for key in self.keys:
+            if key.disabled(now):
+                waits.append(key.disabled_until - now)
+            reset_at = key.limiter.snapshot().get(endpoint, {}).get("reset_at")
+            if reset_at is not None and reset_at > now:
+                waits.append(reset_at - now)
+        return min(waits) if waits else None
+
+    def _unavailable_message(self, endpoint: str) -> str:
+        if not self.keys:
+            return "No API key configured. Request not sent."
+        return f"All {len(self.keys)} API keys are disabled or out of '{endpoint}' quota. Request not sent."
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Combined budget per endpoint: summed limits and remaining counts, earliest reset."""
+        combined: Dict[str, Dict[str, Any]] = {}
+        for key in self.keys:
+            for endpoint, budget in key.limiter.snapshot().items():
+                total = combined.setdefault(endpoint, {"limit": None, "remaining": None, "reset_at": None})
+                for field in ("limit", "remaining"):
+                    if budget[field] is not None:
+                        total[field] = (total[field] or 0) + budget[field]
+                if budget["reset_at"] is not None and (total["reset_at"] is None or budget["reset_at"] < total["reset_at"]):
+                    total["reset_at"] = budget["reset_at"]
+        return combined
+
+    def usage(self) -> List[Dict[str, Any]]:
+        """Per-key budgets and request counts, safe to show (keys are masked)."""
+        now = self.clock()
+        usage = []
+        for key in self.keys:
+            budgets = key.limiter.snapshot()
+            unknown = {"limit": None, "remaining": None, "reset_at": None}
+            usage.append({
+                "key": key.label,
+                "disabled": key.disabled_reason if key.disabled(now) else None,
+                "endpoints": {
+                    endpoint: dict(budgets.get(endpoint, unknown), calls=key.calls[endpoint])
+                    for endpoint in sorted(set(budgets) | set(key.calls))
+                },
+            })
+        return usage
@@ -1,25 +1,208 @@
 import asyncio
+import contextlib
+import gzip
+import io
+import importlib.util
+import ipaddress
+import json
 import logging
 import os
 import re
-from typing import Any, Dict
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional, TextIO, Tuple
 from urllib.parse import urlencode
 
 import httpx
-import uvicorn
 from mcp.server import Server
-from mcp.server.stdio import stdio_server
-from mcp.server.streamable_http import StreamableHTTPServerTransport
 from mcp.types import TextContent, Tool
-from starlette.middleware.cors import CORSMiddleware
+
+from .aggregate import ReportAggregator
+from .blacklist import BlacklistBuilder, BlacklistSnapshot
+from .enrich import Enricher
+from .cache import AccessTracker, CacheEntry, NetworkBlockCache, ResponseCache, format_age
+from .keypool import ApiKey, ApiKeyPool
+from .iputils import extract_ips, non_public_scope, normalize_ip
+from .metrics import ServerMetrics, render_gauge
+from .pagination import prefetch_pages
+from .ratelimit import LocalRateLimitError, QuotaRateLimiter
+from .reporting import ReportQueue, summarize_bulk_response
+from .retry import RetryPolicy
+from .store import CacheBackend, SQLiteBudgetStore, SQLiteLease, create_cache_backend
+from .tracing import create_tracer, httpx_trace_hook
+from .settings import Settings, load_settings
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+def _int_arg(args: Dict[str, Any], name: str, default: int, lo: int, hi: int) -> int:
+    """An integer tool argument clamped to [lo, hi]; missing, null or non-numeric values mean default."""
+    value = args.get(name)
+    try:
+        value = default if value is None else int(value)
+    except (TypeError, ValueError):
+        value = default
+    return max(lo, min(value, hi))
+
+
+def is_error_text(text: str) -> bool:
+    """Whether a tool result is a failure: "❌ ..." text or a JSON error object from format_error."""
+    return text.startswith("❌") or text.startswith('{"error":')
+
+
+class OfflineError(RuntimeError):
+    """Raised instead of contacting AbuseIPDB while the server runs in offline mode."""
+
+
+# Environment variable carrying the parent's resolved settings (JSON) to HTTP worker processes
+WORKER_SETTINGS_ENV = "ABUSEIPDB_WORKER_SETTINGS"
+
+# Appended to every result rendered in offline mode
+OFFLINE_MARKER = "Offline: Yes (answered from local data, AbuseIPDB not contacted)"
+
+
+# 4xx statuses that must not be negatively cached: they depend on the key or quota, not the query
+NON_CACHEABLE_ERROR_STATUSES = {401, 403, 408, 429}
+
+# check_ips summary groupings: result field holding the group key, and the field naming the group
+BULK_GROUPS = {"asn": ("asn", "asOrganization"), "country": ("countryCode", "countryName")}
+
+# Result formats for check_ip/report_ip: human text, full JSON, or JSON with only the key fields
+OUTPUT_MODES = ("text", "json", "compact")
+COMPACT_CHECK_FIELDS = (
+    "ipAddress", "abuseConfidenceScore", "scoreIsMinimum", "countryCode", "isp", "asn", "totalReports", "lastReportedAt",
+    "categories", "blacklisted", "source",
+)
+
 class AbuseIPDBServer:
-    def __init__(self):
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings = settings or load_settings()
         self.server = Server("abuseipdb-mcp-server")
-        self.api_key = os.getenv("ABUSEIPDB_API_KEY")
-        self.base_url = "https://api.abuseipdb.com/api/v2"
+        # Every configured key (ABUSEIPDB_API_KEY plus ABUSEIPDB_API_KEYS); the first is the primary
+        self.api_keys = settings.key_list
+        self.api_key = self.api_keys[0] if self.api_keys else None
+        # Overridable so the server can be pointed at a local stub or caching gateway
+        self.base_url = settings.base_url
+
+        # Connection pool settings for the shared HTTP client
+        self.max_connections = settings.max_connections
+        self.max_keepalive_connections = settings.max_keepalive
+        self.keepalive_expiry = settings.keepalive_expiry
+        self.http2 = settings.http2
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+        # check_ip result cache, keyed on (normalized IP, maxAgeInDays, verbose)
+        self.check_cache = ResponseCache(
+            max_entries=settings.cache_max_entries,
+            ttl=settings.cache_ttl,
+            negative_ttl=settings.cache_negative_ttl,
+            stale_ttl=settings.cache_stale_ttl,
+        )
+        self._revalidations: Dict[Hashable, asyncio.Task] = {}
+
+        # Proactive refresh of the most requested IPs shortly before their cache entries expire
+        self.hot_keys = AccessTracker()
+        self.hot_refresh_top_n = settings.hot_refresh_top_n
+        self.hot_refresh_interval = settings.hot_refresh_interval
+        self.hot_refresh_ahead = settings.hot_refresh_ahead
+        self.hot_refresh_quota_share = settings.hot_refresh_quota_share
+        self.hot_refreshes = 0
+        self._hot_refresh_window: Optional[float] = None
+        self._hot_refresh_spent = 0
+        # Backoff policy for transient upstream failures
+        self.retry_policy = RetryPolicy(
+            max_attempts=settings.retry_max_attempts,
+            base_delay=settings.retry_base_delay,
+            max_delay=settings.retry_max_delay,
+            max_elapsed=settings.retry_max_elapsed,
+        )
+        self.metrics = ServerMetrics()
+        self.tracer = create_tracer(settings.tracing, settings.tracing_file, settings.otlp_endpoint)
+
+        # Client-side quota guard per API key, learned from X-RateLimit-* response headers; HTTP
+        # workers each pace to their share of the quota and exchange budgets through a shared file
+        self.workers = settings.workers
+
+        def make_limiter(key: str) -> QuotaRateLimiter:
+            shared = None
+            if settings.rate_shared_path:
+                shared = SQLiteBudgetStore(settings.rate_shared_path, namespace=f"{ApiKey.fingerprint(key)}:")
+            return QuotaRateLimiter(
+                pacing=settings.rate_pacing,
+                burst_fraction=settings.rate_burst_fraction,
+                max_wait=settings.rate_max_wait,
+                share=1.0 / self.workers,
+                shared=shared,
+            )
+
+        self.key_pool = ApiKeyPool(self.api_keys, make_limiter, disable_seconds=settings.key_disable_seconds)
+
+        # check-block results, also used to answer non-verbose check_ip lookups inside fresh blocks
+        self.block_cache = NetworkBlockCache(
+            max_blocks=settings.block_cache_max_blocks,
+            ttl=settings.effective_block_cache_ttl,
+        )
+
+        # Periodically downloaded blacklist snapshot for zero-quota "known bad" answers
+        self.blacklist: Optional[BlacklistSnapshot] = None
+        self.blacklist_refresh_interval = settings.blacklist_refresh_interval
+        self.blacklist_confidence_minimum = settings.blacklist_confidence_minimum
+        self.blacklist_limit = settings.blacklist_limit
+        self.blacklist_skip_upstream = settings.blacklist_skip_upstream
+        # Each download is saved here, so restarts, offline runs and cache bundles reuse it
+        self.blacklist_path = settings.blacklist_path
+        self._blacklist_loading: Optional[asyncio.Task] = None
+        self._blacklist_mtime: Optional[float] = None
+        self._background_tasks: List[asyncio.Task] = []
+
+        # Offline mode: answer only from local data (cache of any age, check-block, blacklist), never call the API
+        self.offline = settings.offline
+
+        # Optional durable second-level cache shared across restarts and replicas; offline, expired rows are
+        # still the best answer available, so they are not purged
+        self.persistent_cache: Optional[CacheBackend] = create_cache_backend(
+            settings.cache_backend,
+            settings.cache_path,
+            compact_interval=0 if self.offline else settings.cache_compact_interval,
+        )
+
+        # Concurrent identical /check lookups share one upstream request
+        self.check_flights = SingleFlight()
+
+        # Durable buffer of reports uploaded in batches through the bulk-report endpoint
+        self.report_queue = ReportQueue(settings.report_queue_path)
+        self.report_queue_default = settings.report_queue
+        self.report_flush_interval = settings.report_flush_interval
+        self.report_flush_size = settings.report_flush_size
+        self._report_flush_event = asyncio.Event()
+        self._report_flush_lock = asyncio.Lock()
+        self._report_flusher: Optional[asyncio.Task] = None
+
+        # With a shared state file (several workers or replicas), one process at a time downloads the
+        # blacklist, refreshes hot entries and uploads reports on the timer; the others follow its results
+        self.leader_lease: Optional[SQLiteLease] = None
+        if settings.rate_shared_path:
+            self.leader_lease = SQLiteLease(settings.rate_shared_path, "background-jobs", self.report_queue.owner)
+        self.is_leader = self.leader_lease is None
+
+        # Answer private/loopback/reserved addresses locally instead of spending quota
+        self.local_non_public = settings.local_non_public
+
+        # Verbose check results keep a report summary plus only this many of the most recent reports (0 keeps all)
+        self.verbose_max_reports = settings.verbose_max_reports
+
+        # Default and upper bound for parallel upstream lookups in check_ips and scan_log
+        self.bulk_concurrency = settings.bulk_concurrency
+        self.bulk_max_concurrency = settings.bulk_max_concurrency
+        # Unique addresses one check_ips call may look up, so a single call cannot spend the daily quota
+        self.bulk_max_addresses = settings.bulk_max_addresses
+
+        # Directories scan_log may read server-side files from (empty: text input only)
+        self.scan_log_dirs = settings.scan_log_dir_list
+
+        # Local ASN/geo databases that fill in fields missing from check results (none: disabled)
+        self.enricher = Enricher(settings.enrichment_database_list)
         
         # AbuseIPDB categories mapping
         self.categories = {
@@ -61,10 +244,161 @@ class AbuseIPDBServer:
                                 "description": "Include detailed reports in the response",
                                 "default": True,
                             },
+                            "maxReports": {
+                                "type": "integer",
+                                "description": "Most recent individual reports to list when verbose (0-100)",
+                                "minimum": 0,
+                                "maximum": 100,
+                                "default": 5,
+                            },
+                            "output": {
+                                "type": "string",
+                                "enum": list(OUTPUT_MODES),
+                                "description": "Result format: human readable text, structured JSON, or compact JSON with only the key fields",
+                                "default": "text",
+                            },
+                        },
+                        "required": ["ipAddress"],
+                    },
+                ),
+                Tool(
+                    name="check_ips",
+                    description="Check many IP addresses at once (up to the server's limit of unique addresses per call) and return a summary table sorted by abuse confidence score",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "ipAddresses": {
+                                "anyOf": [
+                                    {"type": "array", "items": {"type": "string"}},
+                                    {"type": "string"},
+                                ],
+                                "description": "List of IPv4/IPv6 addresses, or a newline/comma separated text blob",
+                            },
+                            "maxAgeInDays": {
+                                "type": "integer",
+                                "description": "Only consider reports within the last x days (1-365)",
+                                "minimum": 1,
+                                "maximum": 365,
+                                "default": 30,
+                            },
+                            "concurrency": {
+                                "type": "integer",
+                                "description": "Maximum parallel upstream lookups (1-20)",
+                                "minimum": 1,
+                                "maximum": 20,
+                            },
+                            "groupBy": {
+                                "type": "string",
+                                "enum": list(BULK_GROUPS),
+                                "description": "Also summarize the results per autonomous system or country",
+                            },
+                        },
+                        "required": ["ipAddresses"],
+                    },
+                ),
+                Tool(
+                    name="get_reports",
+                    description="Page through the individual abuse reports for an IP address, newest first, stopping at a count or date cutoff",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "ipAddress": {
+                                "type": "string",
+                                "description": "A valid IPv4 or IPv6 address",
+                            },
+                            "maxAgeInDays": {
+                                "type": "integer",
+                                "description": "Only return reports within the last x days (1-365)",
+                                "minimum": 1,
+                                "maximum": 365,
+                                "default": 30,
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Stop after this many reports (1-10000)",
+                                "minimum": 1,
+                                "maximum": 10000,
+                                "default": 100,
+                            },
+                            "since": {
+                                "type": "string",
+                                "description": "Stop at reports older than this ISO 8601 date or datetime (UTC if no offset)",
+                            },
+                            "maxReports": {
+                                "type": "integer",
+                                "description": "Individual reports to list in text and compact output (0-100)",
+                                "minimum": 0,
+                                "maximum": 100,
+                                "default": 25,
+                            },
+                            "output": {
+                                "type": "string",
+                                "enum": list(OUTPUT_MODES),
+                                "description": "Result format: human readable text, JSON with every fetched report, or compact JSON with the summary and the newest reports",
+                                "default": "text",
+                            },
                         },
                         "required": ["ipAddress"],
                     },
                 ),
+                Tool(
+                    name="scan_log",
+                    description="Extract IP addresses from raw log text or a server-side log file, count them, and check the most frequent public ones",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "text": {
+                                "type": "string",
+                                "description": "Raw log lines (nginx, sshd, firewall, ...)",
+                            },
+                            "path": {
+                                "type": "string",
+                                "description": "Log file on the server (plain or .gz) inside ABUSEIPDB_SCAN_LOG_DIRS; use instead of text",
+                            },
+                            "topN": {
+                                "type": "integer",
+                                "description": "Check this many of the most frequent public addresses (1-100)",
+                                "minimum": 1,
+                                "maximum": 100,
+                                "default": 20,
+                            },
+                            "maxAgeInDays": {
+                                "type": "integer",
+                                "description": "Only consider reports within the last x days (1-365)",
+                                "minimum": 1,
+                                "maximum": 365,
+                                "default": 30,
+                            },
+                            "concurrency": {
+                                "type": "integer",
+                                "description": "Maximum parallel upstream lookups (1-20)",
+                                "minimum": 1,
+                                "maximum": 20,
+                            },
+                        },
+                    },
+                ),
+                Tool(
+                    name="check_block",
+                    description="Check a network in CIDR notation (e.g. 203.0.113.0/24) for reported addresses using AbuseIPDB",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "network": {
+                                "type": "string",
+                                "description": "IPv4 or IPv6 network in CIDR notation",
+                            },
+                            "maxAgeInDays": {
+                                "type": "integer",
+                                "description": "Only return reports within the last x days (1-365)",
+                                "minimum": 1,
+                                "maximum": 365,
+                                "default": 30,
+                            },
+                        },
+                        "required": ["network"],
+                    },
+                ),
                 Tool(
                     name="report_ip",
                     description="Report an abusive IP address to AbuseIPDB",
@@ -87,19 +421,55 @@ class AbuseIPDBServer:
                                 "type": "string",
                                 "description": "ISO 8601 datetime of the attack (optional)",
                             },
+                            "queue": {
+                                "type": "boolean",
+                                "description": "Queue the report for the next batched bulk-report upload instead of sending it now",
+                                "default": self.report_queue_default,
+                            },
+                            "output": {
+                                "type": "string",
+                                "enum": list(OUTPUT_MODES),
+                                "description": "Result format: human readable text, structured JSON, or compact JSON with only the key fields",
+                                "default": "text",
+                            },
                         },
                         "required": ["ip", "categories"],
                     },
                 ),
+                Tool(
+                    name="flush_reports",
+                    description="Upload all queued reports to AbuseIPDB now via bulk-report and show the queue depth",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {},
+                    },
+                ),
+                Tool(
+                    name="api_key_usage",
+                    description="Show remaining quota, requests sent and status for each configured API key",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {},
+                    },
+                ),
             ]
 
+        self.tool_handlers = {
+            "check_ip": self.check_ip,
+            "check_ips": self.check_ips,
+            "check_block": self.check_block,
+            "report_ip": self.report_ip,
+            "flush_reports": self.flush_reports,
+            "scan_log": self.scan_log,
+            "get_reports": self.get_reports,
+            "api_key_usage": self.api_key_usage,
+        }
+
         @self.server.call_tool()
         async def call_tool(name, arguments):
-            if name == "check_ip":
-                return await self.check_ip(arguments)
-            elif name == "report_ip":
-                return await self.report_ip(arguments)
-            else:
+            handler = self.tool_handlers.get(name)
+            if handler is None:
+                self.metrics.tool_calls.inc("unknown", "error")
                 return [
                     TextContent(
                         type="text",
@@ -107,95 +477,351 @@ class AbuseIPDBServer:
                     )
                 ]
 
+            started = time.perf_counter()
+            outcome = "error"
+            with self.tracer.span(f"tool {name}", {"mcp.tool.name": name}) as span:
+                try:
+                    result = await handler(arguments)
+                    if not (result and is_error_text(result[0].text)):
+                        outcome = "ok"
+                    return result
+                finally:
+                    span.set_status(outcome == "ok")
+                    self.metrics.tool_calls.inc(name, outcome)
+                    self.metrics.tool_latency.observe(time.perf_counter() - started, name)
+
     def _create_http_client(self) -> httpx.AsyncClient:
         """
         Khởi tạo HTTP Client hỗ trợ tải cấu hình proxy internet thông qua cấu hình môi trường.
         Sử dụng cấu hình tường minh để tránh lỗi RemoteProtocolError/Server Disconnected
         """
+        settings = self.settings
         http_proxy = os.getenv("HTTP_PROXY") or os.getenv("http_proxy")
         https_proxy = os.getenv("HTTPS_PROXY") or os.getenv("https_proxy")
-        no_proxy = os.getenv("NO_PROXY") or os.getenv("no_proxy")
 
         headers = {
-            "User-Agent": "AbuseIPDB-MCP-Server/1.3"
+            "User-Agent": settings.user_agent
         }
 
-        proxy_url = https_proxy or http_proxy
+        timeout = httpx.Timeout(
+            connect=settings.connect_timeout,
+            read=settings.read_timeout,
+            write=settings.write_timeout,
+            pool=settings.pool_timeout,
+        )
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1")
+            http2 = False
+
+        proxy_url = settings.proxy or https_proxy or http_proxy
 
         if proxy_url:
             # Thiết lập tường minh kwarg 'proxy' và 'trust_env=False'.
             # Điều này giúp bypass lỗi của httpx khi cố parse các IP ranges CIDR (như 10.0.0.0/8)
             # trong NO_PROXY khiến socket của proxy tunnel bị block/drop (Server disconnected).
             client = httpx.AsyncClient(
-                timeout=30.0, 
+                timeout=timeout, 
                 proxy=proxy_url, 
                 trust_env=False, 
                 headers=headers,
-                http2=False
+                limits=limits,
+                http2=http2
             )
             logger.debug(f"Đã cấu hình explicit proxy: {proxy_url} (Bypass trust_env để né lỗi regex CIDR)")
         else:
-            client = httpx.AsyncClient(timeout=30.0, trust_env=True, headers=headers, http2=False)
+            client = httpx.AsyncClient(timeout=timeout, trust_env=True, headers=headers, limits=limits, http2=http2)
 
         return client
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared pooled HTTP client, creating it on first use."""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = self._create_http_client()
+        return self._http_client
+
+    async def startup(self):
+        """Start background jobs.
+
+        The shared HTTP client is created by the first upstream request, so an
+        MCP client spawning the server over stdio gets its initialize response
+        without waiting for TLS setup.
+        """
+        if self.enricher.enabled:
+            self._background_tasks.append(asyncio.create_task(asyncio.to_thread(self.enricher.load)))
+        if (self.offline or self.blacklist_refresh_interval > 0) and os.path.exists(self.blacklist_path):
+            self._blacklist_loading = asyncio.create_task(self._follow_blacklist_snapshot())
+            self._background_tasks.append(self._blacklist_loading)
+        if self.offline:
+            logger.info("Offline mode: answering from the local cache and blacklist snapshot only")
+            return
+        if self.leader_lease is not None:
+            self.is_leader = await asyncio.to_thread(self.leader_lease.acquire)
+            self._background_tasks.append(asyncio.create_task(self._hold_leadership()))
+        if self.blacklist_refresh_interval > 0 and self.api_key:
+            self._background_tasks.append(asyncio.create_task(self._refresh_blacklist_periodically()))
+        if self.hot_refresh_top_n > 0 and self.api_key and self.check_cache.enabled:
+            self._background_tasks.append(asyncio.create_task(self._refresh_hot_entries_periodically()))
+        if self.api_key and os.path.exists(self.report_queue.path):
+            # Pick up reports left pending by a previous run
+            self._ensure_report_flusher()
+
+    async def aclose(self):
+        """Stop background jobs, close the shared HTTP client and release pooled connections."""
+        for task in self._background_tasks:
+            task.cancel()
+        self._background_tasks.clear()
+        for task in self._revalidations.values():
+            task.cancel()
+        self._revalidations.clear()
+        self._report_flusher = None
+        if self.leader_lease is not None:
+            if self.is_leader:
+                await asyncio.to_thread(self.leader_lease.release)
+                self.is_leader = False
+            self.leader_lease.close()
+        await self.report_queue.close()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        if self.persistent_cache is not None:
+            await self.persistent_cache.close()
+        for key in self.key_pool.keys:
+            await key.limiter.close()
+        self.enricher.close()
+        await self.tracer.shutdown()
+
+    async def _hold_leadership(self):
+        """Renew the background-jobs lease, or take it over when its holder stops renewing."""
+        while True:
+            await asyncio.sleep(self.leader_lease.ttl / 3)
+            held = await asyncio.to_thread(self.leader_lease.acquire)
+            if held != self.is_leader:
+                logger.info("Running the shared background jobs in this worker" if held else "Background jobs moved to another worker")
+                self.is_leader = held
+
+    def _pool_usage(self) -> Dict[str, int]:
+        """Count active and idle pooled connections (reads httpx/httpcore internals, best effort)."""
+        usage = {"active": 0, "idle": 0}
+        client = self._http_client
+        if client is None or client.is_closed:
+            return usage
+        transports = [getattr(client, "_transport", None)] + list(getattr(client, "_mounts", {}).values())
+        for transport in transports:
+            for connection in getattr(getattr(transport, "_pool", None), "connections", []):
+                try:
+                    usage["idle" if connection.is_idle() else "active"] += 1
+                except Exception:
+                    continue
+        return usage
+
+    def render_metrics(self) -> str:
+        """Export counters, histograms and scrape-time gauges in Prometheus text format."""
+        lines = self.metrics.render()
+
+        cache = self.check_cache.stats()
+        for name, value, documentation in (
+            ("abuseipdb_cache_hits_total", cache["hits"], "check_ip cache hits."),
+            ("abuseipdb_cache_stale_hits_total", cache["stale_hits"], "Stale check_ip results served while revalidating."),
+            ("abuseipdb_cache_misses_total", cache["misses"], "check_ip cache misses."),
+            ("abuseipdb_cache_evictions_total", cache["evictions"], "check_ip cache LRU evictions."),
+            ("abuseipdb_coalesced_requests_total", self.check_flights.coalesced, "check lookups that joined an in-flight request."),
+            ("abuseipdb_cache_hot_refreshes_total", self.hot_refreshes, "Proactive refreshes of hot check_ip entries."),
+        ):
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} counter", f"{name} {value}"]
+        lines += render_gauge("abuseipdb_cache_hit_ratio", "check_ip cache hit ratio since start.", [({}, cache["hit_ratio"])])
+        lines += render_gauge("abuseipdb_cache_entries", "Entries in the check_ip cache.", [({}, cache["size"])])
+
+        pool = self._pool_usage()
+        lines += render_gauge(
+            "abuseipdb_http_pool_connections", "Pooled upstream HTTP connections by state.",
+            [({"state": state}, count) for state, count in pool.items()],
+        )
+        lines += render_gauge("abuseipdb_http_pool_max_connections", "Configured connection pool size.", [({}, self.max_connections)])
+
+        budgets = self.key_pool.snapshot()
+        lines += render_gauge(
+            "abuseipdb_ratelimit_remaining", "Last seen X-RateLimit-Remaining per endpoint.",
+            [({"endpoint": endpoint}, budget["remaining"]) for endpoint, budget in budgets.items()],
+        )
+        lines += render_gauge(
+            "abuseipdb_ratelimit_limit", "Last seen X-RateLimit-Limit per endpoint.",
+            [({"endpoint": endpoint}, budget["limit"]) for endpoint, budget in budgets.items()],
+        )
+        lines += render_gauge(
+            "abuseipdb_ratelimit_reset_timestamp_seconds", "Last seen X-RateLimit-Reset per endpoint.",
+            [({"endpoint": endpoint}, budget["reset_at"]) for endpoint, budget in budgets.items()],
+        )
+        keys = self.key_pool.usage()
+        lines += render_gauge(
+            "abuseipdb_key_ratelimit_remaining", "Last seen X-RateLimit-Remaining per API key and endpoint.",
+            [
+                ({"key": key["key"], "endpoint": endpoint}, budget["remaining"])
+                for key in keys for endpoint, budget in key["endpoints"].items()
+            ],
+        )
+        lines += render_gauge(
+            "abuseipdb_key_requests", "Requests sent with each API key since start, by endpoint.",
+            [
+                ({"key": key["key"], "endpoint": endpoint}, budget["calls"])
+                for key in keys for endpoint, budget in key["endpoints"].items()
+            ],
+        )
+        lines += render_gauge(
+            "abuseipdb_key_disabled", "1 while an API key is disabled after a 401.",
+            [({"key": key["key"]}, 1 if key["disabled"] else 0) for key in keys],
+        )
+        lines += render_gauge(
+            "abuseipdb_blacklist_entries", "Addresses in the blacklist snapshot.",
+            [({}, len(self.blacklist) if self.blacklist is not None else 0)],
+        )
+        return "\n".join(lines) + "\n"
+
     async def _make_request(self, method: str, url: str, **kwargs) -> httpx.Response:
-        """Thực hiện HTTP request với retry logic để phòng ngừa các lỗi network/proxy rớt mạng tạm thời."""
-        max_retries = 3
-        last_error = None
-        for attempt in range(max_retries):
-            try:
-                async with self._create_http_client() as client:
-                    if method == "GET":
-                        return await client.get(url, **kwargs)
-                    elif method == "POST":
-                        return await client.post(url, **kwargs)
-            except httpx.RequestError as error:
-                last_error = error
-                logger.warning(f"Lỗi gọi API [{method}] (lần {attempt + 1}/{max_retries}): {error}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
-                    
-        raise last_error
+        """Thực hiện HTTP request với retry policy (exponential backoff + jitter, Retry-After) cho lỗi network và 5xx/429."""
+        policy = self.retry_policy
+        endpoint = httpx.URL(url).path.rstrip("/").rsplit("/", 1)[-1]
+        if self.offline:
+            raise OfflineError(f"offline mode, '{endpoint}' is not available (ABUSEIPDB_OFFLINE)")
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            key = await self.key_pool.acquire(endpoint)
+            response = None
+            last_error = None
+            attempt_started = time.perf_counter()
+            with self.tracer.span(
+                f"upstream {method} {endpoint}",
+                {"http.request.method": method, "abuseipdb.endpoint": endpoint, "abuseipdb.attempt": attempt, "abuseipdb.key": key.label},
+            ) as span:
+                request_kwargs = dict(kwargs, headers={**kwargs.get("headers", {}), "Key": key.value})
+                if self.tracer.enabled:
+                    request_kwargs["extensions"] = {"trace": httpx_trace_hook(span)}
+                try:
+                    client = self._get_http_client()
+                    response = await client.request(method, url, **request_kwargs)
+                except httpx.RequestError as error:
+                    self.metrics.upstream_latency.observe(time.perf_counter() - attempt_started, endpoint, "error")
+                    span.set_status(False, str(error) or type(error).__name__)
+                    if attempt >= policy.max_attempts or not policy.should_retry_error(method, error):
+                        raise
+                    last_error = error
+                    reason = str(error) or type(error).__name__
+                    delay = policy.backoff(attempt)
+                else:
+                    self.metrics.upstream_latency.observe(time.perf_counter() - attempt_started, endpoint, str(response.status_code))
+                    span.set_attribute("http.response.status_code", response.status_code)
+                    span.set_status(response.is_success)
+                    self.key_pool.observe(key, endpoint, response.status_code, response.headers)
+                    if response.status_code in (401, 429) and self.key_pool.can_fail_over(key, endpoint):
+                        # Another key still has quota: switch immediately, without backoff or using up an attempt
+                        self.key_pool.failovers += 1
+                        self.metrics.key_failovers.inc(endpoint, str(response.status_code))
+                        logger.warning(f"API key {key.label} nhận HTTP {response.status_code} cho {endpoint}; chuyển sang key khác")
+                        attempt -= 1
+                        continue
+                    if attempt >= policy.max_attempts or not policy.should_retry_status(method, response.status_code):
+                        return response
+                    reason = f"HTTP {response.status_code}"
+                    retry_after = policy.retry_after(response)
+                    delay = retry_after if retry_after is not None else policy.backoff(attempt)
+
+            if time.monotonic() - started + delay > policy.max_elapsed:
+                logger.warning(f"Bỏ retry API [{method}] {endpoint}: {reason}, chờ {delay:.1f}s vượt giới hạn {policy.max_elapsed:.0f}s")
+                if response is not None:
+                    return response
+                raise last_error
+
+            self.metrics.upstream_retries.inc(endpoint)
+            logger.warning(f"Lỗi gọi API [{method}] {endpoint} (lần {attempt}/{policy.max_attempts}): {reason}; thử lại sau {delay:.2f}s")
+            await asyncio.sleep(delay)
 
     async def check_ip(self, args: Dict[str, Any]):
         ip_address = args.get("ipAddress")
-        max_age_in_days = args.get("maxAgeInDays", 30)
+        max_age_in_days = _int_arg(args, "maxAgeInDays", 30, 1, 365)
         verbose = args.get("verbose", True)
+        output = args.get("output") or "text"
+        max_reports = _int_arg(args, "maxReports", 5, 0, 100)
 
-        if not self.api_key:
+        if output not in OUTPUT_MODES:
             return [
                 TextContent(
                     type="text",
-                    text="❌ ABUSEIPDB_API_KEY environment variable is required"
+                    text=f"❌ output must be one of: {', '.join(OUTPUT_MODES)}"
                 )
             ]
 
-        if not self.is_valid_ip(ip_address):
+        if not self.api_key and not self.offline:
             return [
                 TextContent(
                     type="text",
-                    text="❌ Invalid IP address format"
+                    text=self.format_error("ABUSEIPDB_API_KEY environment variable is required", output)
                 )
             ]
 
-        params = {"ipAddress": ip_address, "maxAgeInDays": str(max_age_in_days)}
-        if verbose:
-            params["verbose"] = ""
+        raw_address = ip_address
+        ip_address = normalize_ip(ip_address)
+        if ip_address is None:
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error("Invalid IP address format", output, raw_address)
+                )
+            ]
 
-        url = f"{self.base_url}/check?{urlencode(params)}"
+        local = self._local_check(ip_address)
+        if local is not None:
+            return [
+                TextContent(
+                    type="text",
+                    text=self.render_check(local, output, max_reports=max_reports)
+                )
+            ]
+
+        cache_key = (ip_address, str(max_age_in_days), bool(verbose))
+        if self.offline:
+            cached = await self._get_offline_check(cache_key)
+            if cached is None:
+                return [
+                    TextContent(
+                        type="text",
+                        text=self.format_error(
+                            f"Offline: no local data for {ip_address} (AbuseIPDB is not contacted in offline mode)",
+                            output,
+                            ip_address,
+                        )
+                    )
+                ]
+            return self.format_cached_check(cached, output, max_reports)
+
+        if self.hot_refresh_top_n > 0:
+            self.hot_keys.record(cache_key)
+        cached = await self._get_cached_check(cache_key, allow_stale=True)
+        if cached is not None:
+            if cached.is_stale(self.check_cache.clock()):
+                self._revalidate(cache_key)
+            return self.format_cached_check(cached, output, max_reports)
 
         try:
-            response = await self._make_request("GET", url, headers={"Key": self.api_key, "Accept": "application/json"})
-            data = response.json()
+            response, data = await self.check_flights.do(
+                cache_key, lambda: self._fetch_check(cache_key, ip_address, max_age_in_days, verbose)
+            )
 
             if not response.is_success:
-                return self.handle_api_error(response, data)
+                return self.handle_api_error(response, data, output, ip_address)
 
             return [
                 TextContent(
                     type="text",
-                    text=self.format_check_response(data)
+                    text=self.render_check(data, output, max_reports=max_reports)
                 )
             ]
 
@@ -203,157 +829,1417 @@ class AbuseIPDBServer:
             return [
                 TextContent(
                     type="text",
-                    text=f"❌ API request failed: {str(error)}"
+                    text=self.format_error(f"API request failed: {str(error)}", output, ip_address)
                 )
             ]
 
-    async def report_ip(self, args: Dict[str, Any]):
-        ip = args.get("ip")
-        categories = args.get("categories")
-        comment = args.get("comment", "")
-        timestamp = args.get("timestamp")
+    async def check_ips(self, args: Dict[str, Any]):
+        raw = args.get("ipAddresses") or []
+        max_age_in_days = _int_arg(args, "maxAgeInDays", 30, 1, 365)
+        concurrency = _int_arg(args, "concurrency", self.bulk_concurrency, 1, self.bulk_max_concurrency)
+        group_by = args.get("groupBy")
 
-        if not self.api_key:
+        if group_by and group_by not in BULK_GROUPS:
             return [
                 TextContent(
                     type="text",
-                    text="❌ ABUSEIPDB_API_KEY environment variable is required"
+                    text=f"❌ groupBy must be one of: {', '.join(BULK_GROUPS)}"
                 )
             ]
 
-        if not self.is_valid_ip(ip):
+        if not self.api_key and not self.offline:
             return [
                 TextContent(
                     type="text",
-                    text="❌ Invalid IP address format"
+                    text="❌ ABUSEIPDB_API_KEY environment variable is required"
                 )
             ]
 
-        if not self.is_valid_categories(categories):
+        tokens = re.split(r"[\s,;]+", raw) if isinstance(raw, str) else [str(item).strip() for item in raw]
+
+        addresses = []
+        seen = set()
+        errors = []
+        duplicates = 0
+        for token in tokens:
+            if not token:
+                continue
+            normalized = normalize_ip(token)
+            if normalized is None:
+                errors.append((token, "Invalid IP address format"))
+                continue
+            if normalized in seen:
+                duplicates += 1
+                continue
+            seen.add(normalized)
+            addresses.append(normalized)
+
+        if not addresses and not errors:
             return [
                 TextContent(
                     type="text",
-                    text="❌ Categories must be comma-separated integers"
+                    text="❌ No IP addresses supplied"
                 )
             ]
 
-        form_data = {"ip": ip, "categories": categories, "comment": comment}
-        if timestamp:
-            form_data["timestamp"] = timestamp
+        unique = len(addresses)
+        del addresses[self.bulk_max_addresses:]
 
-        try:
-            response = await self._make_request(
-                "POST", 
-                f"{self.base_url}/report",
-                headers={"Key": self.api_key, "Accept": "application/json", "Content-Type": "application/x-www-form-urlencoded"},
-                data=form_data,
+        rows, lookup_errors = await self._bulk_lookup(addresses, max_age_in_days, concurrency)
+        errors.extend(lookup_errors)
+
+        return [
+            TextContent(
+                type="text",
+                text=self.format_bulk_check_response(rows, errors, unique, duplicates, group_by, unique - len(addresses))
             )
-            data = response.json()
+        ]
 
-            if not response.is_success:
-                return self.handle_api_error(response, data)
+    async def _bulk_lookup(
+        self, addresses: List[str], max_age_in_days: int, concurrency: int
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+        """Check normalized addresses through the cache with at most concurrency upstream calls; return (rows, errors)."""
+        semaphore = asyncio.Semaphore(concurrency)
 
+        async def lookup(ip_address: str):
+            local = self._local_check(ip_address)
+            if local is not None:
+                return 200, local
+            cache_key = (ip_address, str(max_age_in_days), False)
+            if self.offline:
+                cached = await self._get_offline_check(cache_key)
+                if cached is None:
+                    raise OfflineError("no local data")
+                return cached.value if cached.negative else (200, cached.value)
+            if self.hot_refresh_top_n > 0:
+                self.hot_keys.record(cache_key)
+            cached = await self._get_cached_check(cache_key, allow_stale=True)
+            if cached is not None:
+                if cached.is_stale(self.check_cache.clock()):
+                    self._revalidate(cache_key)
+                return cached.value if cached.negative else (200, cached.value)
+            async with semaphore:
+                response, data = await self.check_flights.do(
+                    cache_key, lambda: self._fetch_check(cache_key, ip_address, max_age_in_days, False)
+                )
+            return response.status_code, data
+
+        outcomes = await asyncio.gather(*(lookup(ip) for ip in addresses), return_exceptions=True)
+
+        rows = []
+        errors = []
+        for ip_address, outcome in zip(addresses, outcomes):
+            if isinstance(outcome, OfflineError):
+                errors.append((ip_address, f"Offline: {outcome}"))
+                continue
+            if isinstance(outcome, BaseException):
+                errors.append((ip_address, f"API request failed: {outcome}"))
+                continue
+            status, data = outcome
+            if not 200 <= status < 300:
+                errors.append((ip_address, f"API Error ({status}): {self.api_error_detail(data)}"))
+                continue
+            rows.append(self.enricher.enrich(data["data"]))
+        return rows, errors
+
+    async def get_reports(self, args: Dict[str, Any]):
+        ip_address = args.get("ipAddress")
+        max_age_in_days = _int_arg(args, "maxAgeInDays", 30, 1, 365)
+        limit = _int_arg(args, "limit", 100, 1, 10000)
+        max_reports = _int_arg(args, "maxReports", 25, 0, 100)
+        output = args.get("output") or "text"
+
+        if output not in OUTPUT_MODES:
             return [
                 TextContent(
                     type="text",
-                    text=self.format_report_response(data)
+                    text=f"❌ output must be one of: {', '.join(OUTPUT_MODES)}"
                 )
             ]
 
-        except Exception as error:
+        if self.offline:
             return [
                 TextContent(
                     type="text",
-                    text=f"❌ API request failed: {str(error)}"
+                    text=self.format_error("get_reports is not available offline (ABUSEIPDB_OFFLINE): reports are not stored locally", output)
                 )
             ]
 
-    def handle_api_error(self, response: httpx.Response, data: Dict[str, Any]):
-        status = response.status_code
-        
-        if status == 429:
-            retry_after = response.headers.get("Retry-After")
-            remaining = response.headers.get("X-RateLimit-Remaining")
-            limit = response.headers.get("X-RateLimit-Limit")
-            
-            error_message = f"Rate limit exceeded ({status})"
-            if retry_after:
-                error_message += f". Retry after {retry_after} seconds"
-            if limit and remaining is not None:
-                error_message += f". {remaining}/{limit} requests remaining"
-            
+        if not self.api_key:
             return [
                 TextContent(
                     type="text",
-                    text=f"❌ {error_message}\n\nError details: {data}"
+                    text=self.format_error("ABUSEIPDB_API_KEY environment variable is required", output)
                 )
             ]
 
-        error_detail = "Unknown API error"
-        if isinstance(data, dict) and "errors" in data and data["errors"]:
-            error_detail = data["errors"][0].get("detail", error_detail)
-        
-        return [
-            TextContent(
-                type="text",
-                text=f"❌ API Error ({status}): {error_detail}\n\nFull response: {data}"
-            )
-        ]
+        raw_address = ip_address
+        ip_address = normalize_ip(ip_address)
+        if ip_address is None:
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error("Invalid IP address format", output, raw_address)
+                )
+            ]
+
+        since = None
+        if args.get("since"):
+            try:
+                moment = datetime.fromisoformat(args["since"].replace("Z", "+00:00"))
+            except ValueError:
+                return [
+                    TextContent(
+                        type="text",
+                        text=self.format_error("since must be an ISO 8601 date or datetime", output, ip_address)
+                    )
+                ]
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            # Same form as AbuseIPDB's reportedAt, so the two compare as strings
+            since = moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+        # Never ask for more rows per page than the limit needs; the reports quota counts requests
+        per_page = min(100, limit)
 
-    def format_check_response(self, data: Dict[str, Any]) -> str:
+        async def fetch(page: int) -> Dict[str, Any]:
+            response = await self._make_request(
+                "GET",
+                f"{self.base_url}/reports",
+                params={"ipAddress": ip_address, "maxAgeInDays": str(max_age_in_days), "page": str(page), "perPage": str(per_page)},
+                headers={"Accept": "application/json"},
+            )
+            data = response.json()
+            if not response.is_success:
+                return {"page": page, "error": (response, data)}
+            return data["data"]
+
+        reports: List[Dict[str, Any]] = []
+        aggregator = ReportAggregator(keep_recent=0)
+
+        def wants_next(page: Dict[str, Any]) -> bool:
+            # Called before the page is consumed: decide from its tail whether the next one can matter
+            results = page.get("results") or []
+            if "error" in page or not results or page["page"] >= (page.get("lastPage") or 0):
+                return False
+            if len(reports) + len(results) >= limit:
+                return False
+            return not since or (results[-1].get("reportedAt") or "") >= since
+
+        total = pages = 0
+        stopped_by = None
+        error = None
         try:
-            ip_data = data["data"]
-            
-            result = "AbuseIPDB Check Results\n\n"
-            result += f"IP Address: {ip_data['ipAddress']}\n"
-            result += f"Abuse Confidence Score: {ip_data['abuseConfidenceScore']}%\n"
-            result += f"Is Public: {'Yes' if ip_data['isPublic'] else 'No'}\n"
-            result += f"Is Whitelisted: {'Yes' if ip_data['isWhitelisted'] else 'No'}\n"
-            
-            # Country information (may not be present in non-verbose responses)
-            country_name = ip_data.get('countryName', 'Unknown')
-            country_code = ip_data.get('countryCode', 'N/A')
-            result += f"Country: {country_name} ({country_code})\n"
+            async with contextlib.aclosing(prefetch_pages(fetch, wants_next)) as page_stream:
+                async for page in page_stream:
+                    if "error" in page:
+                        response, data = page["error"]
+                        if not pages:
+                            return self.handle_api_error(response, data, output, ip_address)
+                        error = {"status": response.status_code, "detail": self.api_error_detail(data)}
+                        break
+                    pages += 1
+                    total = page.get("total", total)
+                    for report in page.get("results") or []:
+                        if since and (report.get("reportedAt") or "") < since:
+                            stopped_by = "date cutoff"
+                            break
+                        reports.append(report)
+                        aggregator.add(report)
+                        if len(reports) >= limit:
+                            stopped_by = "limit"
+                            break
+                    if stopped_by:
+                        break
+        except Exception as failure:
+            if not pages:
+                return [
+                    TextContent(
+                        type="text",
+                        text=self.format_error(f"API request failed: {str(failure)}", output, ip_address)
+                    )
+                ]
+            error = {"status": None, "detail": f"API request failed: {str(failure)}"}
+
+        result = {
+            "ipAddress": ip_address,
+            "totalReports": total,
+            "fetched": len(reports),
+            "pages": pages,
+            "stoppedBy": stopped_by or ("error" if error else "last page"),
+            "reportSummary": aggregator.summary(self.categories),
+            "reports": reports if output == "json" else reports[:max_reports],
+        }
+        if error:
+            result["error"] = error
+
+        return [
+            TextContent(
+                type="text",
+                text=self.format_reports_response(result) if output == "text" else json.dumps(result, separators=(",", ":"))
+            )
+        ]
+
+    async def scan_log(self, args: Dict[str, Any]):
+        text = args.get("text")
+        path = args.get("path")
+        top_n = _int_arg(args, "topN", 20, 1, 100)
+        max_age_in_days = _int_arg(args, "maxAgeInDays", 30, 1, 365)
+        concurrency = _int_arg(args, "concurrency", self.bulk_concurrency, 1, self.bulk_max_concurrency)
+
+        if not self.api_key and not self.offline:
+            return [
+                TextContent(
+                    type="text",
+                    text="❌ ABUSEIPDB_API_KEY environment variable is required"
+                )
+            ]
+
+        if bool(text) == bool(path):
+            return [
+                TextContent(
+                    type="text",
+                    text="❌ Provide exactly one of text or path"
+                )
+            ]
+
+        try:
+            if path:
+                path = self._scan_log_path(path)
+            # Reading and scanning a large file is blocking work; keep it off the event loop
+            scan = await asyncio.to_thread(self._count_log_ips, text, path)
+        except (OSError, EOFError, UnicodeError) as error:
+            return [
+                TextContent(
+                    type="text",
+                    text=f"❌ Cannot read log: {error}"
+                )
+            ]
+
+        top = scan["counts"].most_common(top_n)
+        rows, errors = await self._bulk_lookup([ip for ip, _ in top], max_age_in_days, concurrency)
+
+        return [
+            TextContent(
+                type="text",
+                text=self.format_scan_log_response(scan, top, rows, errors)
+            )
+        ]
+
+    def _scan_log_path(self, path: str) -> str:
+        """Resolve a server-side log path, which must lie in one of ABUSEIPDB_SCAN_LOG_DIRS."""
+        if not self.scan_log_dirs:
+            raise PermissionError("reading server-side files is disabled (set ABUSEIPDB_SCAN_LOG_DIRS)")
+        resolved = os.path.realpath(path)
+        for directory in self.scan_log_dirs:
+            if os.path.commonpath([resolved, directory]) == directory:
+                return resolved
+        raise PermissionError(f"{path} is outside ABUSEIPDB_SCAN_LOG_DIRS")
+
+    @staticmethod
+    def _open_log(text: Optional[str], path: Optional[str]) -> TextIO:
+        if text:
+            return io.StringIO(text)
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+        return open(path, encoding="utf-8", errors="replace")
+
+    def _count_log_ips(self, text: Optional[str], path: Optional[str]) -> Dict[str, Any]:
+        """Stream the log line by line and count public addresses; memory grows with distinct IPs only."""
+        counts: Counter = Counter()
+        lines = skipped = 0
+        with self._open_log(text, path) as handle:
+            for lines, line in enumerate(handle, start=1):
+                for ip in extract_ips(line):
+                    if non_public_scope(ip) is None:
+                        counts[ip] += 1
+                    else:
+                        skipped += 1
+        return {"lines": lines, "counts": counts, "skipped": skipped}
+
+    def _local_check(self, ip_address: str) -> Optional[Dict[str, Any]]:
+        """Build a check result for a non-public address without calling the API."""
+        if not self.local_non_public:
+            return None
+        scope = non_public_scope(ip_address)
+        if scope is None:
+            return None
+        return {
+            "data": {
+                "ipAddress": ip_address,
+                "isPublic": False,
+                "ipVersion": 6 if ":" in ip_address else 4,
+                "isWhitelisted": None,
+                "abuseConfidenceScore": 0,
+                "usageType": "Reserved",
+                "totalReports": 0,
+                "source": f"local ({scope} address, not sent to AbuseIPDB)",
+            }
+        }
+
+    async def _fetch_check(
+        self, cache_key: Tuple, ip_address: str, max_age_in_days: int, verbose: bool
+    ) -> Tuple[httpx.Response, Any]:
+        """Query /check upstream and store the outcome in the check cache."""
+        params = {"ipAddress": ip_address, "maxAgeInDays": str(max_age_in_days)}
+        if verbose:
+            params["verbose"] = ""
+
+        url = f"{self.base_url}/check?{urlencode(params)}"
+
+        response = await self._make_request("GET", url, headers={"Accept": "application/json"})
+        data = response.json()
+
+        if response.is_success:
+            if verbose:
+                data = self.condense_reports(data)
+            await self._store_cached_check(cache_key, data)
+        elif 400 <= response.status_code < 500 and response.status_code not in NON_CACHEABLE_ERROR_STATUSES:
+            await self._store_cached_check(cache_key, [response.status_code, data], negative=True)
+
+        return response, data
+
+    def condense_reports(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace the raw report list of a verbose check with a summary and the most recent reports."""
+        ip_data = data.get("data") or {}
+        reports = ip_data.get("reports")
+        if not reports:
+            return data
+        aggregator = ReportAggregator(keep_recent=self.verbose_max_reports).extend(reports)
+        ip_data["reportSummary"] = aggregator.summary(self.categories)
+        if self.verbose_max_reports > 0:
+            ip_data["reports"] = aggregator.recent()
+        return data
+
+    async def _get_cached_check(self, cache_key: Tuple, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """Look up a check result in memory, the persistent cache, then fresh check-block data.
+
+        With allow_stale, a recently expired in-memory entry is returned when
+        nothing fresher is available; the caller is expected to revalidate it.
+        """
+        with self.tracer.span("cache lookup", {"abuseipdb.cache.key": self._persistent_key(cache_key)}) as span:
+            entry = self.check_cache.get(cache_key, allow_stale=allow_stale)
+            if entry is not None and not entry.is_stale(self.check_cache.clock()):
+                span.set_attribute("abuseipdb.cache.tier", "memory")
+                return entry
+            stale, entry = entry, None
+            if self.persistent_cache is not None:
+                try:
+                    entry = await self.persistent_cache.get(self._persistent_key(cache_key))
+                except Exception as error:
+                    logger.warning(f"Persistent cache read failed: {error}")
+                if entry is not None:
+                    span.set_attribute("abuseipdb.cache.tier", "persistent")
+                    self.check_cache.put_entry(cache_key, entry)
+                    return entry
+            entry = self._check_from_block(cache_key) or self._check_from_blacklist(cache_key)
+            if entry is not None:
+                span.set_attribute("abuseipdb.cache.tier", "derived")
+                return entry
+            span.set_attribute("abuseipdb.cache.tier", "stale" if stale is not None else "miss")
+            return stale
+
+    async def _get_offline_check(self, cache_key: Tuple) -> Optional[CacheEntry]:
+        """Offline lookup: a stored result of any age, else the other verbose variant, then derived data."""
+        ip_address, max_age_in_days, verbose = cache_key
+        for key in (cache_key, (ip_address, max_age_in_days, not verbose)):
+            entry = self.check_cache.peek(key)
+            if entry is None and self.persistent_cache is not None:
+                try:
+                    entry = await self.persistent_cache.get(self._persistent_key(key), include_expired=True)
+                except Exception as error:
+                    logger.warning(f"Persistent cache read failed: {error}")
+            if entry is not None:
+                return entry
+        if self._blacklist_loading is not None:
+            await self._blacklist_loading
+        return self._check_from_block(cache_key) or self._check_from_blacklist(cache_key)
+
+    def _revalidate(self, cache_key: Tuple):
+        """Refresh a stale check result in the background, at most once per key at a time."""
+        if cache_key in self._revalidations:
+            return
+        task = asyncio.create_task(self._refresh_check(cache_key))
+        self._revalidations[cache_key] = task
+        task.add_done_callback(lambda done: self._revalidations.pop(cache_key, None))
+
+    async def _refresh_check(self, cache_key: Tuple) -> bool:
+        """Re-fetch a cached check result; failures keep the existing entry."""
+        ip_address, max_age_in_days, verbose = cache_key
+        try:
+            response, _ = await self.check_flights.do(
+                cache_key, lambda: self._fetch_check(cache_key, ip_address, max_age_in_days, verbose)
+            )
+        except Exception as error:
+            logger.warning(f"Background refresh of {ip_address} failed: {error}")
+            return False
+        return response.is_success
+
+    def _hot_refresh_allowance(self) -> Optional[int]:
+        """Refreshes still allowed in the current quota window (None if the limit is not known yet)."""
+        budget = self.key_pool.snapshot().get("check")
+        if not budget or not budget["limit"]:
+            return None
+        if budget["reset_at"] != self._hot_refresh_window:
+            self._hot_refresh_window = budget["reset_at"]
+            self._hot_refresh_spent = 0
+        return max(0, int(budget["limit"] * self.hot_refresh_quota_share) - self._hot_refresh_spent)
+
+    async def refresh_hot_entries(self) -> int:
+        """Re-fetch the most requested cached checks that are about to expire.
+
+        Spends at most ABUSEIPDB_HOT_REFRESH_QUOTA_SHARE of the daily check
+        limit per quota window. Returns the number of entries refreshed.
+        """
+        now = self.check_cache.clock()
+        refreshed = 0
+        for cache_key in self.hot_keys.top(self.hot_refresh_top_n):
+            entry = self.check_cache.peek(cache_key)
+            if entry is None or entry.negative or entry.expires_at - now > self.hot_refresh_ahead:
+                continue
+            allowance = self._hot_refresh_allowance()
+            if allowance is not None and allowance <= 0:
+                break
+            self._hot_refresh_spent += 1
+            if await self._refresh_check(cache_key):
+                refreshed += 1
+        self.hot_refreshes += refreshed
+        return refreshed
+
+    async def _refresh_hot_entries_periodically(self):
+        while True:
+            await asyncio.sleep(self.hot_refresh_interval)
+            if not self.is_leader:
+                # Another worker refreshes; its results reach this one through the shared cache
+                self.hot_keys.decay()
+                continue
+            try:
+                refreshed = await self.refresh_hot_entries()
+                if refreshed:
+                    logger.info(f"Refreshed {refreshed} hot check_ip cache entries")
+            except Exception as error:
+                logger.warning(f"Hot entry refresh failed: {error}")
+            self.hot_keys.decay()
+
+    def _check_from_block(self, cache_key: Tuple) -> Optional[CacheEntry]:
+        """Answer a non-verbose check from a cached check-block result covering the address."""
+        ip_address, max_age_in_days, verbose = cache_key
+        if verbose:
+            # Block data carries no individual reports
+            return None
+        found = self.block_cache.find(ip_address, max_age_in_days)
+        if found is None:
+            return None
+        network, block_entry, row = found
+        address = ipaddress.ip_address(ip_address)
+        row = row or {}
+        data = {
+            "data": {
+                "ipAddress": ip_address,
+                "isPublic": address.is_global,
+                "ipVersion": address.version,
+                "isWhitelisted": None,
+                "abuseConfidenceScore": row.get("abuseConfidenceScore", 0),
+                "countryCode": row.get("countryCode") or "N/A",
+                "totalReports": row.get("numReports", 0),
+                "lastReportedAt": row.get("mostRecentReport"),
+                "source": f"check-block {network}",
+            }
+        }
+        return CacheEntry(value=data, stored_at=block_entry.stored_at, expires_at=block_entry.expires_at)
+
+    async def _store_cached_check(self, cache_key: Tuple, value: Any, negative: bool = False):
+        entry = self.check_cache.set(cache_key, value, negative=negative)
+        if entry is None or self.persistent_cache is None:
+            return
+        try:
+            await self.persistent_cache.set(self._persistent_key(cache_key), entry)
+        except Exception as error:
+            logger.warning(f"Persistent cache write failed: {error}")
+
+    @staticmethod
+    def _persistent_key(cache_key: Tuple) -> str:
+        ip_address, max_age_in_days, verbose = cache_key
+        return f"check|{ip_address}|{max_age_in_days}|{int(verbose)}"
+
+    def _check_from_blacklist(self, cache_key: Tuple) -> Optional[CacheEntry]:
+        """Answer a check locally when the address is in the blacklist snapshot."""
+        snapshot = self.blacklist
+        if snapshot is None or not (self.blacklist_skip_upstream or self.offline):
+            return None
+        ip_address = cache_key[0]
+        if ip_address not in snapshot:
+            return None
+        address = ipaddress.ip_address(ip_address)
+        data = {
+            "data": {
+                "ipAddress": ip_address,
+                "isPublic": address.is_global,
+                "ipVersion": address.version,
+                "isWhitelisted": None,
+                # The plaintext blacklist carries addresses only: the score is the list's threshold
+                # and report counts are unknown, so totalReports/lastReportedAt are left out
+                "abuseConfidenceScore": snapshot.confidence_minimum,
+                "scoreIsMinimum": snapshot.confidence_minimum < 100,
+                "blacklisted": True,
+                "source": f"blacklist snapshot, not a live check (listed with score ≥ {snapshot.confidence_minimum}%)",
+            }
+        }
+        return CacheEntry(value=data, stored_at=snapshot.fetched_at, expires_at=float("inf"))
+
+    async def refresh_blacklist(self) -> BlacklistSnapshot:
+        """Download the blacklist in plaintext mode and swap in a new snapshot."""
+        params = {
+            "confidenceMinimum": str(self.blacklist_confidence_minimum),
+            "limit": str(self.blacklist_limit),
+            "plaintext": "",
+        }
+        url = f"{self.base_url}/blacklist?{urlencode(params)}"
+        key = await self.key_pool.acquire("blacklist")
+
+        builder = BlacklistBuilder()
+        client = self._get_http_client()
+        # Stream line by line so the (potentially huge) list is never buffered as one document
+        async with client.stream(
+            "GET", url, headers={"Key": key.value, "Accept": "text/plain"}, timeout=httpx.Timeout(30.0, read=120.0)
+        ) as response:
+            self.key_pool.observe(key, "blacklist", response.status_code, response.headers)
+            if not response.is_success:
+                await response.aread()
+                try:
+                    detail = self.api_error_detail(response.json())
+                except ValueError:
+                    detail = response.text[:200]
+                raise RuntimeError(f"Blacklist download failed ({response.status_code}): {detail}")
+            async for line in response.aiter_lines():
+                builder.add(line)
+
+        snapshot = builder.build(self.blacklist_confidence_minimum)
+        self.blacklist = snapshot
+        logger.info(f"Loaded blacklist snapshot with {len(snapshot)} addresses (score ≥ {snapshot.confidence_minimum})")
+        try:
+            await asyncio.to_thread(snapshot.save, self.blacklist_path)
+        except OSError as error:
+            logger.warning(f"Saving blacklist snapshot to {self.blacklist_path} failed: {error}")
+        return snapshot
+
+    async def _load_blacklist_snapshot(self) -> Optional[BlacklistSnapshot]:
+        """Adopt the snapshot saved at blacklist_path when it is newer than the one in memory."""
+        try:
+            snapshot = await asyncio.to_thread(BlacklistSnapshot.load, self.blacklist_path)
+        except (OSError, ValueError) as error:
+            logger.warning(f"Blacklist snapshot {self.blacklist_path} not loaded: {error}")
+            return None
+        if self.blacklist is None or snapshot.fetched_at > self.blacklist.fetched_at:
+            self.blacklist = snapshot
+            logger.info(f"Loaded saved blacklist snapshot with {len(snapshot)} addresses from {self.blacklist_path}")
+        return snapshot
+
+    async def _follow_blacklist_snapshot(self):
+        """Adopt the snapshot saved by the worker that downloads the blacklist, when the file changed."""
+        try:
+            mtime = os.stat(self.blacklist_path).st_mtime
+        except OSError:
+            return
+        if mtime != self._blacklist_mtime:
+            self._blacklist_mtime = mtime
+            await self._load_blacklist_snapshot()
+
+    async def _refresh_blacklist_periodically(self):
+        delay = 0.0
+        if self._blacklist_loading is not None:
+            await self._blacklist_loading
+        while True:
+            await asyncio.sleep(delay)
+            if not self.is_leader:
+                await self._follow_blacklist_snapshot()
+                delay = self.leader_lease.ttl
+                continue
+            snapshot = self.blacklist
+            if snapshot is not None and snapshot.confidence_minimum == self.blacklist_confidence_minimum:
+                # A snapshot saved earlier (by a previous run or another worker) is used until it is due
+                due_in = snapshot.fetched_at + self.blacklist_refresh_interval - time.time()
+                if due_in > 0:
+                    delay = due_in
+                    continue
+            delay = self.blacklist_refresh_interval
+            try:
+                await self.refresh_blacklist()
+            except LocalRateLimitError as error:
+                logger.warning(f"Blacklist refresh skipped: {error}")
+                if error.retry_after:
+                    delay = max(delay, error.retry_after)
+            except Exception as error:
+                logger.warning(f"Blacklist refresh failed: {error}")
+
+    async def check_block(self, args: Dict[str, Any]):
+        network = args.get("network")
+        max_age_in_days = _int_arg(args, "maxAgeInDays", 30, 1, 365)
+
+        if not self.api_key and not self.offline:
+            return [
+                TextContent(
+                    type="text",
+                    text="❌ ABUSEIPDB_API_KEY environment variable is required"
+                )
+            ]
+
+        try:
+            network = str(ipaddress.ip_network(str(network or "").strip(), strict=False))
+        except ValueError:
+            return [
+                TextContent(
+                    type="text",
+                    text="❌ Invalid network format, expected CIDR notation (e.g. 203.0.113.0/24)"
+                )
+            ]
+
+        cached = self.block_cache.get(network, str(max_age_in_days))
+        if cached is not None:
+            age = format_age(cached.age(self.block_cache.clock()))
+            return [
+                TextContent(
+                    type="text",
+                    text=f"{self.format_check_block_response(cached.value)}Cached: Yes (data age {age})\n"
+                    + (OFFLINE_MARKER + "\n" if self.offline else "")
+                )
+            ]
+
+        if self.offline:
+            return [
+                TextContent(
+                    type="text",
+                    text=f"❌ Offline: no local data for {network} (check_block results are only kept in memory; AbuseIPDB is not contacted in offline mode)"
+                )
+            ]
+
+        params = {"network": network, "maxAgeInDays": str(max_age_in_days)}
+
+        try:
+            response = await self._make_request(
+                "GET",
+                f"{self.base_url}/check-block?{urlencode(params)}",
+                headers={"Accept": "application/json"},
+            )
+            data = response.json()
+
+            if not response.is_success:
+                return self.handle_api_error(response, data)
+
+            self.block_cache.set(network, str(max_age_in_days), data)
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_check_block_response(data)
+                )
+            ]
+
+        except Exception as error:
+            return [
+                TextContent(
+                    type="text",
+                    text=f"❌ API request failed: {str(error)}"
+                )
+            ]
+
+    async def report_ip(self, args: Dict[str, Any]):
+        ip = args.get("ip")
+        categories = args.get("categories")
+        comment = args.get("comment", "")
+        timestamp = args.get("timestamp")
+        output = args.get("output") or "text"
+
+        if output not in OUTPUT_MODES:
+            return [
+                TextContent(
+                    type="text",
+                    text=f"❌ output must be one of: {', '.join(OUTPUT_MODES)}"
+                )
+            ]
+
+        if not self.api_key and not self.offline:
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error("ABUSEIPDB_API_KEY environment variable is required", output)
+                )
+            ]
+
+        raw_address = ip
+        ip = normalize_ip(ip)
+        if ip is None:
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error("Invalid IP address format", output, raw_address)
+                )
+            ]
+
+        if not self.is_valid_categories(categories):
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error("Categories must be comma-separated integers", output, ip)
+                )
+            ]
+
+        if args.get("queue", self.report_queue_default) or self.offline:
+            # Offline, reports wait in the durable queue until the server runs online again
+            return await self.queue_report(ip, categories, comment, timestamp, output)
+
+        form_data = {"ip": ip, "categories": categories, "comment": comment}
+        if timestamp:
+            form_data["timestamp"] = timestamp
+
+        try:
+            response = await self._make_request(
+                "POST", 
+                f"{self.base_url}/report",
+                headers={"Accept": "application/json", "Content-Type": "application/x-www-form-urlencoded"},
+                data=form_data,
+            )
+            data = response.json()
+
+            if not response.is_success:
+                return self.handle_api_error(response, data, output, ip)
+
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_report_response(data, output)
+                )
+            ]
+
+        except Exception as error:
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error(f"API request failed: {str(error)}", output, ip)
+                )
+            ]
+
+    async def queue_report(self, ip: str, categories: str, comment: str, timestamp: Optional[str], output: str = "text"):
+        try:
+            result = await self.report_queue.enqueue(ip, categories, comment, timestamp)
+        except Exception as error:
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error(f"Failed to queue report: {str(error)}", output, ip)
+                )
+            ]
+
+        self._ensure_report_flusher()
+        if result.depth >= self.report_flush_size:
+            self._report_flush_event.set()
+
+        if output != "text":
+            text = json.dumps(
+                {"ipAddress": ip, "status": result.status, "categories": result.categories, "queueDepth": result.depth},
+                separators=(",", ":"),
+            )
+        elif result.status == "duplicate":
+            text = (
+                f"Report Skipped\n\nIP Address: {ip}\n"
+                "Reason: already reported in the last 15 minutes (AbuseIPDB would reject the duplicate)\n"
+            )
+        elif result.status == "merged":
+            text = (
+                f"IP Address Report Merged\n\nIP Address: {ip}\n"
+                f"Categories: {result.categories} (merged into the pending report)\n"
+            )
+        else:
+            text = f"IP Address Queued for Bulk Report\n\nIP Address: {ip}\nCategories: {result.categories}\n"
+        if output == "text":
+            text += f"Queue Depth: {result.depth}\n"
+
+        return [
+            TextContent(
+                type="text",
+                text=text
+            )
+        ]
+
+    async def flush_reports(self, args: Optional[Dict[str, Any]] = None):
+        if self.offline:
+            return [
+                TextContent(
+                    type="text",
+                    text=f"❌ flush_reports is not available offline (ABUSEIPDB_OFFLINE): {await self.report_queue.depth()} "
+                    "queued reports stay queued until the server runs online"
+                )
+            ]
+
+        if not self.api_key:
+            return [
+                TextContent(
+                    type="text",
+                    text="❌ ABUSEIPDB_API_KEY environment variable is required"
+                )
+            ]
+
+        batches = saved = 0
+        invalid: List[Dict[str, Any]] = []
+        error_text = None
+        async with self._report_flush_lock:
+            while True:
+                batch = await self.report_queue.next_batch()
+                if batch is None:
+                    break
+                try:
+                    response = await self._make_request(
+                        "POST",
+                        f"{self.base_url}/bulk-report",
+                        headers={"Accept": "application/json"},
+                        files={"csv": ("report.csv", batch.csv, "text/csv")},
+                    )
+                    data = response.json()
+                except Exception as error:
+                    await self.report_queue.release(batch)
+                    error_text = f"❌ API request failed: {str(error)}"
+                    break
+                if not response.is_success:
+                    await self.report_queue.release(batch)
+                    error_text = self.handle_api_error(response, data)[0].text
+                    break
+                await self.report_queue.complete(batch)
+                batch_saved, batch_invalid = summarize_bulk_response(data)
+                batches += 1
+                saved += batch_saved
+                invalid.extend(batch_invalid)
+                if not batch.full:
+                    # Reports queued during the upload wait for the next trigger
+                    break
+            depth = await self.report_queue.depth()
+
+        lines = ["Bulk Report Flush", ""]
+        lines.append(f"Uploaded Batches: {batches}")
+        lines.append(f"Saved Reports: {saved}")
+        lines.append(f"Invalid Reports: {len(invalid)}")
+        for row in invalid[:20]:
+            lines.append(f"  - {row.get('input', 'N/A')} (row {row.get('rowNumber', '?')}): {row.get('error', 'Unknown error')}")
+        if len(invalid) > 20:
+            lines.append(f"  ... {len(invalid) - 20} more")
+        lines.append(f"Queue Depth: {depth}")
+        if error_text:
+            lines.append("")
+            lines.append(error_text)
+
+        return [
+            TextContent(
+                type="text",
+                text="\n".join(lines) + "\n"
+            )
+        ]
+
+    async def api_key_usage(self, args: Optional[Dict[str, Any]] = None):
+        if not self.api_key:
+            return [
+                TextContent(
+                    type="text",
+                    text="❌ ABUSEIPDB_API_KEY environment variable is required"
+                )
+            ]
+
+        now = time.time()
+        table = [("Key", "Endpoint", "Requests", "Remaining", "Resets In")]
+        for key in self.key_pool.usage():
+            if not key["endpoints"]:
+                table.append((key["key"], "-", "0", "unknown", "-"))
+            for endpoint, budget in key["endpoints"].items():
+                remaining = "unknown" if budget["remaining"] is None else f"{budget['remaining']}/{budget['limit'] or '?'}"
+                resets_in = "-" if budget["reset_at"] is None else f"{max(0, int(budget['reset_at'] - now))}s"
+                table.append((key["key"], endpoint, str(budget["calls"]), remaining, resets_in))
+
+        lines = ["API Key Usage", ""]
+        lines.append(f"Keys: {len(self.key_pool)}")
+        lines.append(f"Failovers: {self.key_pool.failovers}")
+        for key in self.key_pool.usage():
+            if key["disabled"]:
+                lines.append(f"Disabled: {key['key']} ({key['disabled']})")
+        lines.append("")
+        lines.extend(self.format_table(table))
+
+        return [
+            TextContent(
+                type="text",
+                text="\n".join(lines) + "\n"
+            )
+        ]
+
+    def _ensure_report_flusher(self):
+        if self.offline:
+            return
+        if self._report_flusher is None or self._report_flusher.done():
+            self._report_flusher = asyncio.create_task(self._flush_reports_periodically())
+            self._background_tasks.append(self._report_flusher)
+
+    async def _flush_reports_periodically(self):
+        """Flush the report queue when it reaches the size trigger or every flush interval."""
+        while True:
+            try:
+                await asyncio.wait_for(self._report_flush_event.wait(), timeout=self.report_flush_interval)
+            except asyncio.TimeoutError:
+                if not self.is_leader:
+                    # One worker uploads on the timer, or every worker would spend the 5/day bulk-report quota
+                    continue
+            self._report_flush_event.clear()
+            try:
+                if await self.report_queue.depth():
+                    result = await self.flush_reports()
+                    logger.info(result[0].text.replace("\n", " "))
+            except Exception as error:
+                logger.warning(f"Background report flush failed: {error}")
+
+    def handle_api_error(
+        self, response: httpx.Response, data: Dict[str, Any], output: str = "text", ip_address: Optional[str] = None
+    ):
+        status = response.status_code
+
+        if output != "text":
+            extra = {}
+            if status == 429 and response.headers.get("Retry-After"):
+                extra["retryAfter"] = response.headers["Retry-After"]
+            return [
+                TextContent(
+                    type="text",
+                    text=self.format_error(self.api_error_detail(data), output, ip_address, status, **extra)
+                )
+            ]
+
+        if status == 429:
+            retry_after = response.headers.get("Retry-After")
+            remaining = response.headers.get("X-RateLimit-Remaining")
+            limit = response.headers.get("X-RateLimit-Limit")
             
-            result += f"ISP: {ip_data.get('isp', 'N/A')}\n"
-            result += f"Usage Type: {ip_data.get('usageType', 'N/A')}\n"
-            result += f"Domain: {ip_data.get('domain', 'N/A')}\n"
-            result += f"Total Reports: {ip_data.get('totalReports', 0)}\n"
+            error_message = f"Rate limit exceeded ({status})"
+            if retry_after:
+                error_message += f". Retry after {retry_after} seconds"
+            if limit and remaining is not None:
+                error_message += f". {remaining}/{limit} requests remaining"
             
+            return [
+                TextContent(
+                    type="text",
+                    text=f"❌ {error_message}\n\nError details: {data}"
+                )
+            ]
+
+        return [
+            TextContent(
+                type="text",
+                text=self.format_api_error(status, data)
+            )
+        ]
+
+    def format_error(
+        self, detail: str, output: str = "text", ip_address: Optional[str] = None, status: Optional[int] = None, **extra: Any
+    ) -> str:
+        """A tool failure as "❌ detail" text, or as a JSON error object for the json and compact output modes."""
+        if output == "text":
+            return f"❌ {detail}"
+        result: Dict[str, Any] = {"error": {"status": status, "detail": detail, **extra}}
+        if ip_address is not None:
+            result["ipAddress"] = ip_address
+        return json.dumps(result, separators=(",", ":"), ensure_ascii=False)
+
+    def format_api_error(self, status: int, data: Dict[str, Any]) -> str:
+        return f"❌ API Error ({status}): {self.api_error_detail(data)}\n\nFull response: {data}"
+
+    def api_error_detail(self, data: Dict[str, Any]) -> str:
+        error_detail = "Unknown API error"
+        if isinstance(data, dict) and "errors" in data and data["errors"]:
+            error_detail = data["errors"][0].get("detail", error_detail)
+        return error_detail
+
+    def format_cached_check(self, entry: CacheEntry, output: str = "text", max_reports: int = 5):
+        """Render a cached check_ip result, flagged with the age of the data."""
+        if entry.negative and output != "text":
+            status, data = entry.value
+            now = self.check_cache.clock()
+            extra: Dict[str, Any] = {"cached": {"ageSeconds": int(entry.age(now)), "stale": entry.is_stale(now)}}
+            if self.offline:
+                extra["offline"] = True
+            text = self.format_error(self.api_error_detail(data), output, None, status, **extra)
+        elif entry.negative:
+            status, data = entry.value
+            text = f"{self.format_api_error(status, data)}\n\nCached: Yes (data age {self._cache_age(entry)})"
+            if self.offline:
+                text += "\n" + OFFLINE_MARKER
+        else:
+            text = self.render_check(entry.value, output, entry, max_reports)
+
+        return [
+            TextContent(
+                type="text",
+                text=text
+            )
+        ]
+
+    def render_check(
+        self, data: Dict[str, Any], output: str = "text", entry: Optional[CacheEntry] = None, max_reports: int = 5
+    ) -> str:
+        """Render a check result in the requested output mode, with cache metadata when served from cache."""
+        if data.get("data"):
+            data = dict(data, data=self._mark_blacklisted(self.enricher.enrich(data["data"])))
+        if output == "text":
+            text = self.format_check_response(data, max_reports)
+            if entry is not None and not text.startswith("❌"):
+                text += f"Cached: Yes (data age {self._cache_age(entry)})\n"
+            if self.offline and not text.startswith("❌"):
+                text += OFFLINE_MARKER + "\n"
+            return text
+
+        try:
+            summary = self.summarize_check(data)
+        except KeyError as e:
+            return self.format_error(f"Error formatting response - missing field {str(e)}", output)
+        if output == "compact":
+            summary = {field: summary[field] for field in COMPACT_CHECK_FIELDS if summary[field] not in (None, "", [])}
+        else:
+            ip_data = data["data"]
+            if ip_data.get("reportSummary"):
+                summary["reportSummary"] = ip_data["reportSummary"]
+            if ip_data.get("reports") and max_reports > 0:
+                summary["recentReports"] = self._recent_reports(ip_data)[:max_reports]
+        if entry is not None:
+            now = self.check_cache.clock()
+            summary["cached"] = {"ageSeconds": int(entry.age(now)), "stale": entry.is_stale(now)}
+        if self.offline:
+            summary["offline"] = True
+        return json.dumps(summary, separators=(",", ":"), ensure_ascii=False)
+
+    def _mark_blacklisted(self, ip_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Flag a result (e.g. a live check) whose address is also in the blacklist snapshot."""
+        snapshot = self.blacklist
+        if snapshot is None or "blacklisted" in ip_data or ip_data.get("ipAddress") not in snapshot:
+            return ip_data
+        return dict(ip_data, blacklisted=True)
+
+    def _cache_age(self, entry: CacheEntry) -> str:
+        now = self.check_cache.clock()
+        age = format_age(entry.age(now))
+        if entry.is_stale(now):
+            age += ", expired" if self.offline else ", stale — refresh in progress"
+        return age
+
+    def category_names(self, ip_data: Dict[str, Any]) -> List[str]:
+        """Distinct category names across the reports of a check result, most reported first when summarized."""
+        report_summary = ip_data.get("reportSummary")
+        if report_summary:
+            return [category["name"] for category in report_summary["categories"]]
+        names = dict.fromkeys(
+            self.categories.get(category_id) or str(category_id)
+            for report in ip_data.get("reports") or ()
+            for category_id in report.get("categories", ())
+        )
+        return list(names)
+
+    def _recent_reports(self, ip_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Reports newest first (condensed results are already ordered)."""
+        reports = ip_data.get("reports") or []
+        if ip_data.get("reportSummary") and self.verbose_max_reports > 0:
+            return reports
+        return sorted(reports, key=lambda report: report.get("reportedAt") or "", reverse=True)
+
+    def summarize_check(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the structured fields of a check result (used by the json/compact outputs)."""
+        ip_data = data["data"]
+        return {
+            "ipAddress": ip_data["ipAddress"],
+            "abuseConfidenceScore": ip_data["abuseConfidenceScore"],
+            "isPublic": ip_data.get("isPublic"),
+            "isWhitelisted": ip_data.get("isWhitelisted"),
+            "ipVersion": ip_data.get("ipVersion"),
+            "countryCode": ip_data.get("countryCode"),
+            "countryName": ip_data.get("countryName"),
+            "isp": ip_data.get("isp"),
+            "usageType": ip_data.get("usageType"),
+            "domain": ip_data.get("domain"),
+            "isTor": ip_data.get("isTor"),
+            "totalReports": ip_data.get("totalReports"),
+            "numDistinctUsers": ip_data.get("numDistinctUsers"),
+            "lastReportedAt": ip_data.get("lastReportedAt"),
+            "categories": self.category_names(ip_data),
+            "asn": ip_data.get("asn"),
+            "asOrganization": ip_data.get("asOrganization"),
+            "enrichedFields": ip_data.get("enrichedFields"),
+            "blacklisted": ip_data.get("blacklisted"),
+            "scoreIsMinimum": ip_data.get("scoreIsMinimum"),
+            "source": ip_data.get("source"),
+        }
+
+    def format_check_response(self, data: Dict[str, Any], max_reports: int = 5) -> str:
+        try:
+            ip_data = data["data"]
+            is_whitelisted = ip_data['isWhitelisted']
+            category_names = self.category_names(ip_data)
+
+            lines = [
+                "AbuseIPDB Check Results",
+                "",
+                f"IP Address: {ip_data['ipAddress']}",
+                f"Abuse Confidence Score: {self.format_score(ip_data)}",
+                f"Is Public: {'Yes' if ip_data['isPublic'] else 'No'}",
+                f"Is Whitelisted: {'Unknown' if is_whitelisted is None else 'Yes' if is_whitelisted else 'No'}",
+                # Country information (may not be present in non-verbose responses)
+                f"Country: {ip_data.get('countryName', 'Unknown')} ({ip_data.get('countryCode', 'N/A')})",
+                f"ISP: {ip_data.get('isp', 'N/A')}",
+            ]
+            if ip_data.get('asn'):
+                lines.append(f"ASN: AS{ip_data['asn']} ({ip_data.get('asOrganization') or 'N/A'})")
+            lines += [
+                f"Usage Type: {ip_data.get('usageType', 'N/A')}",
+                f"Domain: {ip_data.get('domain', 'N/A')}",
+                f"Total Reports: {ip_data.get('totalReports', 'Unknown')}",
+            ]
             if ip_data.get('lastReportedAt'):
-                result += f"Last Reported: {ip_data['lastReportedAt']}\n"
-            
+                lines.append(f"Last Reported: {ip_data['lastReportedAt']}")
             if 'isTor' in ip_data:
-                result += f"Is Tor: {'Yes' if ip_data['isTor'] else 'No'}\n"
-
-            category_names = []
-            if ip_data.get('reports') and len(ip_data['reports']) > 0:
-                for report in ip_data['reports']:
-                    # Map category numbers to human-readable names
-                    for category_id in report.get('categories', []):
-                        category_name = self.categories.get(category_id)
-                        if category_name:
-                            if category_name in category_names:
-                                continue
-                            category_names.append(f"{category_name}")
-                        else:
-                            category_names.append(str(category_id))
-            if category_names:
-                result += f"Categories: {', '.join(category_names)}\n"
+                lines.append(f"Is Tor: {'Yes' if ip_data['isTor'] else 'No'}")
+            if ip_data.get('blacklisted'):
+                lines.append("Blacklisted: Yes (in the local blacklist snapshot)")
+            if ip_data.get('source'):
+                lines.append(f"Source: {ip_data['source']}")
+            if ip_data.get('enrichedFields'):
+                lines.append(f"Enriched Locally: {', '.join(ip_data['enrichedFields'])}")
+
+            report_summary = ip_data.get('reportSummary')
+            if report_summary:
+                lines += self.format_report_summary(report_summary)
             else:
-                result += "Categories: N/A\n"
+                lines.append(f"Categories: {', '.join(category_names) if category_names else 'N/A'}")
 
-            return result
+            if max_reports > 0 and ip_data.get('reports'):
+                lines.append("Recent Reports:")
+                lines += [self.format_report_line(report) for report in self._recent_reports(ip_data)[:max_reports]]
+            lines.append("")
+
+            return "\n".join(lines)
         except KeyError as e:
             # If there's a KeyError, return a debug-friendly error message
-            import json
             return f"❌ Error formatting response - missing field {str(e)}. Raw data: {json.dumps(data, indent=2)}"
         except Exception as e:
             return f"❌ Error formatting response: {str(e)}"
 
-    def format_report_response(self, data: Dict[str, Any]) -> str:
+    def format_report_line(self, report: Dict[str, Any]) -> str:
+        """One indented line per individual report: time, reporter country, categories and comment."""
+        names = ", ".join(self.categories.get(category_id, str(category_id)) for category_id in report.get('categories', ()))
+        comment = " ".join((report.get('comment') or "").split())
+        if len(comment) > 120:
+            comment = comment[:117] + "..."
+        line = f"  {report.get('reportedAt', 'N/A')} [{report.get('reporterCountryCode') or '??'}] {names or 'N/A'}"
+        return f"{line} — {comment}" if comment else line
+
+    def format_reports_response(self, result: Dict[str, Any]) -> str:
+        lines = [f"AbuseIPDB Reports for {result['ipAddress']}", ""]
+        lines.append(f"Fetched: {result['fetched']} of {result['totalReports']} reports ({result['pages']} page(s), stopped by {result['stoppedBy']})")
+        if result["fetched"]:
+            lines += self.format_report_summary(result["reportSummary"])
+        if result["reports"]:
+            lines.append("Reports:")
+            lines += [self.format_report_line(report) for report in result["reports"]]
+            if result["fetched"] > len(result["reports"]):
+                lines.append(f"  ... {result['fetched'] - len(result['reports'])} more")
+        if result.get("error"):
+            lines.append("")
+            error = result["error"]
+            if error["status"] is None:
+                lines.append(f"❌ {error['detail']}")
+            else:
+                lines.append(f"❌ API Error ({error['status']}): {error['detail']}")
+        return "\n".join(lines) + "\n"
+
+    def format_report_summary(self, report_summary: Dict[str, Any]) -> List[str]:
+        """Lines describing the aggregated reports of a verbose check."""
+        categories = ", ".join(f"{category['name']} ({category['count']})" for category in report_summary["categories"])
+        lines = [f"Categories: {categories or 'N/A'}"]
+        countries = report_summary["reporterCountries"][:5]
+        if countries:
+            lines.append("Reporter Countries: " + ", ".join(f"{country['countryCode']} ({country['count']})" for country in countries))
+        lines.append(f"Distinct Reporters: {report_summary['distinctReporters']}")
+        if report_summary["firstSeen"]:
+            lines.append(f"First Seen: {report_summary['firstSeen']}")
+            lines.append(f"Last Seen: {report_summary['lastSeen']}")
+        if report_summary["reportsPerDay"] is not None:
+            peak = report_summary["peakDay"]
+            lines.append(f"Report Rate: {report_summary['reportsPerDay']}/day (peak {peak['reports']} on {peak['date']})")
+        return lines
+
+    def format_bulk_check_response(
+        self,
+        rows: List[Dict[str, Any]],
+        errors: List[Tuple[str, str]],
+        unique: int,
+        duplicates: int,
+        group_by: Optional[str] = None,
+        not_checked: int = 0,
+    ) -> str:
+        rows = sorted(rows, key=lambda row: row.get("abuseConfidenceScore") or 0, reverse=True)
+
+        lines = ["AbuseIPDB Bulk Check Results", ""]
+        lines.append(f"Unique IPs: {unique} (duplicates removed: {duplicates}, errors: {len(errors)})")
+        if not_checked:
+            lines.append(
+                f"Not Checked: {not_checked} (only the first {self.bulk_max_addresses} unique addresses are checked per call; "
+                "ABUSEIPDB_BULK_MAX_ADDRESSES)"
+            )
+        if self.offline:
+            lines.append(OFFLINE_MARKER)
+        lines.append("")
+
+        if rows and group_by:
+            lines.extend(self.format_bulk_groups(rows, group_by))
+            lines.append("")
+
+        if rows:
+            table = [("Score", "IP Address", "Country", "Reports", "Usage Type", "ISP")]
+            for row in rows:
+                table.append((
+                    self.format_score(row),
+                    row.get("ipAddress", "N/A"),
+                    row.get("countryCode") or "N/A",
+                    str(row.get("totalReports", "?")),
+                    row.get("usageType") or "N/A",
+                    row.get("isp") or "N/A",
+                ))
+            lines.extend(self.format_table(table))
+
+        if errors:
+            lines.append("")
+            lines.append("Errors:")
+            for ip_address, message in errors:
+                lines.append(f"{ip_address}: {message}")
+
+        return "\n".join(lines) + "\n"
+
+    def format_scan_log_response(
+        self,
+        scan: Dict[str, Any],
+        top: List[Tuple[str, int]],
+        rows: List[Dict[str, Any]],
+        errors: List[Tuple[str, str]],
+    ) -> str:
+        by_ip = {row.get("ipAddress"): row for row in rows}
+
+        lines = ["AbuseIPDB Log Scan Results", ""]
+        lines.append(f"Lines Scanned: {scan['lines']}")
+        lines.append(f"IP Occurrences: {sum(scan['counts'].values())} (non-public skipped: {scan['skipped']})")
+        lines.append(f"Distinct Public IPs: {len(scan['counts'])}")
+        lines.append(f"Checked: top {len(top)} by occurrences")
+        if self.offline:
+            lines.append(OFFLINE_MARKER)
+        lines.append("")
+
+        if rows:
+            table = [("Hits", "Score", "IP Address", "Country", "Reports", "Usage Type", "ISP")]
+            for ip_address, hits in top:
+                row = by_ip.get(ip_address)
+                if row is None:
+                    continue
+                table.append((
+                    str(hits),
+                    self.format_score(row),
+                    ip_address,
+                    row.get("countryCode") or "N/A",
+                    str(row.get("totalReports", "?")),
+                    row.get("usageType") or "N/A",
+                    row.get("isp") or "N/A",
+                ))
+            lines.extend(self.format_table(table))
+        elif not top:
+            lines.append("No public IP addresses found.")
+
+        if errors:
+            lines.append("")
+            lines.append("Errors:")
+            for ip_address, message in errors:
+                lines.append(f"{ip_address}: {message}")
+
+        return "\n".join(lines) + "\n"
+
+    def format_bulk_groups(self, rows: List[Dict[str, Any]], group_by: str) -> List[str]:
+        """Per-group table (addresses, highest score, reports) for check_ips results, worst groups first."""
+        key_field, name_field = BULK_GROUPS[group_by]
+        groups: Dict[Any, Dict[str, Any]] = {}
+        for row in rows:
+            group = groups.setdefault(row.get(key_field), {"name": row.get(name_field), "ips": 0, "score": 0, "reports": 0})
+            group["ips"] += 1
+            group["score"] = max(group["score"], row.get("abuseConfidenceScore") or 0)
+            group["reports"] += row.get("totalReports") or 0
+            group["name"] = group["name"] or row.get(name_field)
+
+        label = "ASN" if group_by == "asn" else "Country"
+        table = [(label, "IPs", "Max Score", "Reports", "Name")]
+        for key, group in sorted(groups.items(), key=lambda item: (item[1]["score"], item[1]["ips"]), reverse=True):
+            if key is None:
+                shown = "Unknown"
+            else:
+                shown = f"AS{key}" if group_by == "asn" else str(key)
+            table.append((shown, str(group["ips"]), f"{group['score']}%", str(group["reports"]), group["name"] or "N/A"))
+        return [f"By {label}:"] + self.format_table(table)
+
+    def format_check_block_response(self, data: Dict[str, Any], max_rows: int = 100) -> str:
+        block = data["data"]
+        reported = sorted(
+            block.get("reportedAddress") or [],
+            key=lambda row: (row.get("abuseConfidenceScore") or 0, row.get("numReports") or 0),
+            reverse=True,
+        )
+
+        try:
+            network = str(ipaddress.ip_network(f"{block['networkAddress']}/{block['netmask']}"))
+        except (KeyError, ValueError):
+            network = block.get("networkAddress", "N/A")
+        lines = ["AbuseIPDB Check-Block Results", ""]
+        lines.append(f"Network: {network}")
+        lines.append(f"Address Space: {block.get('addressSpaceDesc') or 'N/A'}")
+        lines.append(f"Address Range: {block.get('minAddress', 'N/A')} - {block.get('maxAddress', 'N/A')}")
+        lines.append(f"Possible Hosts: {block.get('numPossibleHosts', 'N/A')}")
+        lines.append(f"Reported Addresses: {len(reported)}")
+
+        if reported:
+            lines.append("")
+            table = [("Score", "IP Address", "Reports", "Country", "Most Recent Report")]
+            for row in reported[:max_rows]:
+                table.append((
+                    f"{row.get('abuseConfidenceScore', 0)}%",
+                    row.get("ipAddress", "N/A"),
+                    str(row.get("numReports", 0)),
+                    row.get("countryCode") or "N/A",
+                    row.get("mostRecentReport") or "N/A",
+                ))
+            lines.extend(self.format_table(table))
+            if len(reported) > max_rows:
+                lines.append(f"... {len(reported) - max_rows} more reported addresses not shown")
+
+        return "\n".join(lines) + "\n"
+
+    def format_score(self, ip_data: Dict[str, Any]) -> str:
+        """The abuse score as text, as a lower bound for blacklist snapshot answers."""
+        prefix = "≥ " if ip_data.get("scoreIsMinimum") else ""
+        return f"{prefix}{ip_data.get('abuseConfidenceScore', 0)}%"
+
+    def format_table(self, table: List[Tuple[str, ...]]) -> List[str]:
+        """Align rows into ' | ' separated columns; the last column is left unpadded."""
+        widths = [max(len(line[i]) for line in table) for i in range(len(table[0]) - 1)]
+        return [
+            " | ".join([cell.ljust(width) for cell, width in zip(line, widths)] + [line[-1]])
+            for line in table
+        ]
+
+    def format_report_response(self, data: Dict[str, Any], output: str = "text") -> str:
         report_data = data["data"]
-        
+        if output != "text":
+            return json.dumps(
+                {
+                    "ipAddress": report_data.get("ipAddress"),
+                    "status": "reported",
+                    "abuseConfidenceScore": report_data.get("abuseConfidenceScore"),
+                },
+                separators=(",", ":"),
+            )
+
         result = "IP Address Reported Successfully\n\n"
         result += f"IP Address: {report_data.get('ipAddress', 'N/A')}\n"
         result += f"Updated Abuse Confidence Score: {report_data.get('abuseConfidenceScore', 'N/A')}%\n"
@@ -361,14 +2247,8 @@ class AbuseIPDBServer:
         return result
 
     def is_valid_ip(self, ip: str) -> bool:
-        """Basic IP validation (IPv4 and IPv6)"""
-        if not ip:
-            return False
-            
-        ipv4_pattern = r"^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$"
-        ipv6_pattern = r"^(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$|^::1$|^::$"
-        
-        return bool(re.match(ipv4_pattern, ip) or re.match(ipv6_pattern, ip))
+        """IP validation (IPv4 and IPv6, including compressed, bracketed, zoned and IPv4-mapped forms)"""
+        return normalize_ip(ip) is not None
 
     def is_valid_categories(self, categories: str) -> bool:
         """Check if categories is a comma-separated list of integers"""
@@ -380,47 +2260,130 @@ class AbuseIPDBServer:
 
     async def run(self):
         """Run the MCP server using stdio transport"""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+        from mcp.server.stdio import stdio_server
 
-    def run_http(self, host: str = "0.0.0.0", port: int = 8000):
-        """Run the MCP server using Streamable HTTP transport"""
-        transport = StreamableHTTPServerTransport(
-            mcp_session_id=None,
+        await self.startup()
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            await self.aclose()
+
+    def build_http_app(self, stateless: bool = False, json_response: bool = False):
+        """Build the ASGI app: a session-managed Streamable HTTP endpoint plus /metrics, behind CORS."""
+        # HTTP-only dependencies are imported here so the stdio transport never loads them
+        from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+        from starlette.applications import Starlette
+        from starlette.middleware.cors import CORSMiddleware
+        from starlette.responses import Response
+        from starlette.routing import Mount, Route
+
+        session_manager = StreamableHTTPSessionManager(
+            app=self.server,
+            stateless=stateless,
+            json_response=json_response,
         )
 
-        # Wrap transport's ASGI handler with CORS middleware
-        app = CORSMiddleware(
-            app=transport.handle_request,
+        async def metrics(request):
+            return Response(self.render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+        async def handle_mcp(scope, receive, send):
+            await session_manager.handle_request(scope, receive, send)
+
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            await self.startup()
+            try:
+                async with session_manager.run():
+                    yield
+            finally:
+                await self.aclose()
+
+        app = Starlette(
+            routes=[Route("/metrics", metrics, methods=["GET"]), Mount("/", app=handle_mcp)],
+            lifespan=lifespan,
+        )
+
+        # Wrap the session manager (plus /metrics) with CORS middleware
+        return CORSMiddleware(
+            app=app,
             allow_origins=["*"],
             allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
             allow_headers=["*"],
             expose_headers=["Mcp-Session-Id"],
         )
 
-        async def run_server():
-            async with transport.connect() as (read_stream, write_stream):
-                server_task = asyncio.create_task(
-                    self.server.run(
-                        read_stream,
-                        write_stream,
-                        self.server.create_initialization_options()
-                    )
-                )
-                logger.info(f"MCP Streamable HTTP server running on http://{host}:{port}/mcp")
+    def run_http(self, host: str = "0.0.0.0", port: int = 8000, workers: int = 1, stateless: Optional[bool] = None):
+        """Run the MCP server using Streamable HTTP transport.
+
+        Every client gets its own session. With several workers, uvicorn
+        forks one process per worker; sessions are then stateless by default
+        (any worker can answer any request) and the cache and rate limit
+        budgets are shared through SQLite files on the same volume.
+        """
+        import uvicorn
+
+        if stateless is None:
+            stateless = workers > 1
+        json_response = os.getenv("MCP_HTTP_JSON_RESPONSE", "false").lower() in ("1", "true", "yes")
+
+        if workers > 1:
+            run_http_workers(self.settings, host=host, port=port, workers=workers, stateless=stateless)
+            return
+
+        app = self.build_http_app(stateless=stateless, json_response=json_response)
+        logger.info(f"MCP Streamable HTTP server running on http://{host}:{port}/mcp (metrics at /metrics)")
+        uvicorn.run(app, host=host, port=port, log_level="info")
+
+
+def run_http_workers(settings: Settings, host: str = "0.0.0.0", port: int = 8000, workers: int = 2, stateless: Optional[bool] = None):
+    """Run the Streamable HTTP transport in several uvicorn worker processes.
+
+    No server is built in the calling process: each worker builds its own
+    through create_http_app from these settings, which are handed over in
+    the environment (WORKER_SETTINGS_ENV) so programmatic overrides reach
+    the workers too. Unless configured explicitly, the cache moves to the
+    sqlite backend and rate limit budgets to a shared file, so the workers
+    share both.
+    """
+    import uvicorn
+
+    overrides: Dict[str, Any] = {"workers": workers}
+    explicit = settings.model_fields_set
+    if "cache_backend" not in explicit and settings.cache_backend == "memory":
+        logger.warning(f"Using the sqlite cache backend ({settings.cache_path}) so all {workers} workers share one cache")
+        overrides["cache_backend"] = "sqlite"
+    elif settings.cache_backend == "memory":
+        logger.warning(f"cache_backend=memory: each of the {workers} workers keeps its own check_ip cache")
+    if "rate_shared_path" not in explicit and not settings.rate_shared_path:
+        overrides["rate_shared_path"] = os.path.join("logs", "abuseipdb-ratelimit.db")
+    elif not settings.rate_shared_path:
+        logger.warning("rate_shared_path is empty: workers do not share rate limit budgets and each runs the background jobs")
+
+    os.environ[WORKER_SETTINGS_ENV] = settings.model_copy(update=overrides).model_dump_json()
+    os.environ["MCP_WORKERS"] = str(workers)
+    os.environ["MCP_HTTP_STATELESS"] = "false" if stateless is False else "true"
+    logger.info(f"MCP Streamable HTTP server running on http://{host}:{port}/mcp with {workers} workers (metrics at /metrics)")
+    uvicorn.run(
+        "abuseipdb_mcp.modules:create_http_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        log_level="info",
+    )
 
-                config = uvicorn.Config(
-                    app,
-                    host=host,
-                    port=port,
-                    log_level="info",
-                )
-                uvi_server = uvicorn.Server(config)
-                await uvi_server.serve()
-                server_task.cancel()
 
-        asyncio.run(run_server())
+def create_http_app():
+    """ASGI app factory used by uvicorn worker processes; configuration comes from the environment."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    handed_over = os.getenv(WORKER_SETTINGS_ENV)
+    settings = Settings.model_validate_json(handed_over) if handed_over else None
+    return AbuseIPDBServer(settings).build_http_app(
+        stateless=os.getenv("MCP_HTTP_STATELESS", "false").lower() in ("1", "true", "yes"),
+        json_response=os.getenv("MCP_HTTP_JSON_RESPONSE", "false").lower() in ("1", "true", "yes"),
+    )
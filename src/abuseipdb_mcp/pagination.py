@@ -0,0 +1,41 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+Page = Dict[str, Any]
+
+# Event loop turns given to a prefetch before its page is handed over. httpx needs
+# about four on a kept-alive connection before the request is on the wire.
+SEND_TURNS = 16
+
+
+async def prefetch_pages(
+    fetch: Callable[[int], Awaitable[Page]],
+    wants_next: Callable[[Page], bool],
+    first_page: int = 1,
+) -> AsyncIterator[Page]:
+    """Yield pages in order, requesting page n+1 while the caller works on page n.
+
+    wants_next(page) is called as soon as a page arrives and before it is
+    yielded; the following page is only requested when it returns True, so a
+    caller that can tell from a page that it has enough (a count or date
+    cutoff) never spends quota on one more page. A prefetch still pending
+    when the caller stops iterating is cancelled.
+    """
+    pending = asyncio.ensure_future(fetch(first_page))
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+            if wants_next(page):
+                pending = asyncio.ensure_future(fetch(page["page"] + 1))
+                # Let the request go out now: a caller that processes the page without
+                # awaiting would otherwise hold it back until the next __anext__
+                for _ in range(SEND_TURNS):
+                    if pending.done():
+                        break
+                    await asyncio.sleep(0)
+            yield page
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
@@ -0,0 +1,234 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .cache import format_age
+
+
+class LocalRateLimitError(Exception):
+    """Raised when a request is refused locally to protect the daily quota."""
+
+    def __init__(self, endpoint: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+@dataclass
+class EndpointBudget:
+    """Daily budget for one endpoint as last reported by X-RateLimit-* headers."""
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: Optional[float] = None
+    tokens: float = 0.0
+    updated_at: float = 0.0
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class QuotaRateLimiter:
+    """Per-endpoint token bucket paced by the remaining daily quota.
+
+    The budget is learned from the X-RateLimit-Limit, X-RateLimit-Remaining
+    and X-RateLimit-Reset headers of every response. Once the budget is
+    exhausted, requests fail locally until the reset epoch instead of
+    spending a round-trip on a guaranteed 429. A budget exhausted without
+    any reset time (a bare 429) is held for unknown_reset seconds only.
+
+    With pacing enabled (opt-in), tokens refill at remaining /
+    seconds-until-reset so the budget is spread across the day, with a
+    burst allowance of a fraction of what is left; a request that would wait
+    longer than max_wait for a slot is refused locally.
+
+    When several processes spend the same API key, share scales each one's
+    burst and refill rate to its slice of the quota, and an optional shared
+    store (publish/load, see store.SQLiteBudgetStore) lets every process
+    adopt the lowest remaining count any of them has seen. The store is
+    only called from worker threads: observed budgets are written by a
+    background task, so a busy database file never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        pacing: bool = False,
+        burst_fraction: float = 0.2,
+        min_burst: float = 5.0,
+        max_wait: float = 10.0,
+        share: float = 1.0,
+        shared: Optional[Any] = None,
+        sync_interval: float = 1.0,
+        unknown_reset: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.pacing = pacing
+        self.burst_fraction = burst_fraction
+        self.min_burst = min_burst
+        self.max_wait = max_wait
+        self.share = share
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.unknown_reset = unknown_reset
+        self.clock = clock
+        self._budgets: Dict[str, EndpointBudget] = {}
+        self._synced_at = 0.0
+        self._unpublished: Dict[str, tuple] = {}
+        self._publishing: Optional[asyncio.Task] = None
+        self.rejected = 0
+        self.delayed = 0
+
+    def _capacity(self, budget: EndpointBudget) -> float:
+        return max(1.0, self.min_burst * self.share, budget.remaining * self.burst_fraction * self.share)
+
+    def _refill(self, budget: EndpointBudget, now: float) -> float:
+        """Top up the bucket and return the current refill rate in tokens/second."""
+        rate = budget.remaining * self.share / max(1.0, budget.reset_at - now)
+        budget.tokens = min(self._capacity(budget), budget.tokens + (now - budget.updated_at) * rate)
+        budget.updated_at = now
+        return rate
+
+    async def acquire(self, endpoint: str):
+        """Reserve one request slot, sleeping briefly if pacing requires it."""
+        now = self.clock()
+        if self.shared is not None and now - self._synced_at >= self.sync_interval:
+            await self._sync(now)
+        budget = self._budgets.get(endpoint)
+        if budget is None or budget.remaining is None:
+            return
+
+        if budget.reset_at is not None and now >= budget.reset_at:
+            # Quota window rolled over; the next response reports the new budget
+            del self._budgets[endpoint]
+            return
+
+        if budget.remaining <= 0:
+            self.rejected += 1
+            retry_after = budget.reset_at - now if budget.reset_at is not None else None
+            raise LocalRateLimitError(endpoint, self._exhausted_message(endpoint, budget, retry_after), retry_after)
+
+        wait = 0.0
+        if self.pacing and budget.reset_at is not None:
+            rate = self._refill(budget, now)
+            if budget.tokens < 1:
+                wait = (1 - budget.tokens) / rate if rate > 0 else float("inf")
+                if wait > self.max_wait:
+                    self.rejected += 1
+                    raise LocalRateLimitError(
+                        endpoint,
+                        f"Local rate limit: {budget.remaining} '{endpoint}' requests left until the daily reset "
+                        f"are being spread out; next slot in {format_age(wait)}. Request not sent.",
+                        wait,
+                    )
+            budget.tokens -= 1
+
+        budget.remaining -= 1
+        if wait > 0:
+            self.delayed += 1
+            await asyncio.sleep(wait)
+
+    def observe(self, endpoint: str, status: int, headers: Mapping[str, str]):
+        """Learn the endpoint budget from a response's rate limit headers."""
+        limit = _header_number(headers, "X-RateLimit-Limit")
+        remaining = _header_number(headers, "X-RateLimit-Remaining")
+        reset_at = _header_number(headers, "X-RateLimit-Reset")
+        now = self.clock()
+
+        if status == 429:
+            remaining = 0
+            retry_after = _header_number(headers, "Retry-After")
+            if reset_at is None and retry_after is not None:
+                reset_at = now + retry_after
+
+        if remaining is None:
+            return
+
+        budget = self._budgets.get(endpoint)
+        fresh = budget is None or budget.remaining is None
+        if budget is None:
+            budget = self._budgets[endpoint] = EndpointBudget()
+
+        if limit is not None:
+            budget.limit = int(limit)
+        budget.remaining = int(remaining)
+        if reset_at is not None:
+            budget.reset_at = reset_at
+        elif budget.remaining <= 0 and (budget.reset_at is None or budget.reset_at <= now):
+            # Nothing says when the quota comes back; refuse for a bounded window, not until restart
+            budget.reset_at = now + self.unknown_reset
+        if fresh:
+            budget.tokens = self._capacity(budget)
+            budget.updated_at = now
+        else:
+            budget.tokens = min(budget.tokens, self._capacity(budget))
+        if self.shared is not None:
+            # Only the latest budget per endpoint matters, so writes queued behind a slow one are merged
+            self._unpublished[endpoint] = (budget.limit, budget.remaining, budget.reset_at, now)
+            if self._publishing is None or self._publishing.done():
+                self._publishing = asyncio.get_running_loop().create_task(self._publish())
+
+    async def _publish(self):
+        """Write the budgets observed since the last write to the shared store."""
+        while self._unpublished:
+            pending, self._unpublished = self._unpublished, {}
+            for endpoint, (limit, remaining, reset_at, updated_at) in pending.items():
+                await asyncio.to_thread(self.shared.publish, endpoint, limit, remaining, reset_at, updated_at)
+
+    async def _sync(self, now: float):
+        """Adopt budgets published by other processes when they report less quota left."""
+        self._synced_at = now
+        published = await asyncio.to_thread(self.shared.load)
+        for endpoint, (limit, remaining, reset_at, _) in published.items():
+            if reset_at is not None and reset_at <= now:
+                continue
+            budget = self._budgets.get(endpoint)
+            if budget is None or budget.remaining is None:
+                budget = self._budgets[endpoint] = EndpointBudget(limit=limit, remaining=remaining, reset_at=reset_at)
+                budget.tokens = self._capacity(budget)
+                budget.updated_at = now
+            elif remaining < budget.remaining:
+                budget.remaining = remaining
+                budget.tokens = min(budget.tokens, self._capacity(budget))
+                if reset_at is not None:
+                    budget.reset_at = reset_at
+
+    def _exhausted_message(self, endpoint: str, budget: EndpointBudget, retry_after: Optional[float]) -> str:
+        message = f"Daily quota for '{endpoint}' is exhausted"
+        if budget.limit is not None:
+            message += f" (0/{budget.limit} remaining)"
+        if budget.reset_at is not None:
+            reset = datetime.fromtimestamp(budget.reset_at, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+            message += f"; resets at {reset} (in {format_age(retry_after)})"
+        return message + ". Request not sent."
+
+    async def close(self):
+        """Finish pending writes to the shared store and close it."""
+        if self.shared is None:
+            return
+        if self._publishing is not None:
+            await self._publishing
+            self._publishing = None
+        self.shared.close()
+
+    def remaining(self, endpoint: str) -> Optional[int]:
+        """Requests left for endpoint in the current window, or None if unknown or the window has reset."""
+        budget = self._budgets.get(endpoint)
+        if budget is None or budget.remaining is None:
+            return None
+        if budget.reset_at is not None and self.clock() >= budget.reset_at:
+            return None
+        return budget.remaining
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            endpoint: {"limit": budget.limit, "remaining": budget.remaining, "reset_at": budget.reset_at}
+            for endpoint, budget in self._budgets.items()
+        }
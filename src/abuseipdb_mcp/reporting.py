@@ -0,0 +1,247 @@
+import asyncio
+import csv
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# AbuseIPDB rejects a second report of the same IP by the same user within 15 minutes
+DUPLICATE_WINDOW = 15 * 60
+# bulk-report accepts at most 10,000 rows and 2 MB per CSV upload
+BULK_REPORT_MAX_ROWS = 10000
+BULK_REPORT_MAX_BYTES = 2 * 1024 * 1024
+COMMENT_MAX_LENGTH = 1024
+# A claimed batch not completed or released within this many seconds is assumed abandoned
+CLAIM_TIMEOUT = 600.0
+
+
+@dataclass
+class QueueResult:
+    """Outcome of enqueueing one report."""
+    status: str  # "queued", "merged" or "duplicate"
+    ip: str
+    categories: str
+    depth: int
+
+
+@dataclass
+class Batch:
+    """Rows taken from the queue for one bulk-report upload."""
+    ids: List[int]
+    ips: List[str]
+    csv: bytes
+    full: bool  # hit a row or size limit, so more rows may be waiting
+
+
+class ReportQueue:
+    """Durable SQLite buffer of pending reports for the bulk-report endpoint.
+
+    Reports for an IP that is already pending within the 15 minute duplicate
+    window are merged into the pending row (categories are unioned), and
+    reports for an IP uploaded within the window are dropped, since the API
+    would reject them anyway.
+
+    Several processes (HTTP workers) can share one queue file: next_batch()
+    claims its rows for this queue's owner inside one write transaction, so
+    no two uploads contain the same row, and complete()/release() only touch
+    rows the owner still holds. Claims older than claim_timeout are taken
+    over, so rows held by a crashed process are uploaded eventually.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        clock: Callable[[], float] = time.time,
+        owner: Optional[str] = None,
+        claim_timeout: float = CLAIM_TIMEOUT,
+    ):
+        self.path = path
+        self.clock = clock
+        self.owner = owner or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.claim_timeout = claim_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, ip TEXT NOT NULL, categories TEXT NOT NULL, "
+                "reported_at TEXT NOT NULL, comment TEXT NOT NULL DEFAULT '', queued_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(pending)")}
+            if "claimed_by" not in columns:
+                # Queue files created before uploads were claimed
+                conn.execute("ALTER TABLE pending ADD COLUMN claimed_by TEXT")
+                conn.execute("ALTER TABLE pending ADD COLUMN claimed_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS pending_ip ON pending (ip)")
+            conn.execute("CREATE TABLE IF NOT EXISTS sent (ip TEXT PRIMARY KEY, sent_at REAL NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn):
+        def call():
+            with self._lock:
+                return fn(self._connect())
+
+        return await asyncio.to_thread(call)
+
+    async def enqueue(self, ip: str, categories: str, comment: str = "", timestamp: Optional[str] = None) -> QueueResult:
+        now = self.clock()
+        reported_at = timestamp or datetime.fromtimestamp(now, tz=timezone.utc).isoformat(timespec="seconds")
+        comment = (comment or "")[:COMMENT_MAX_LENGTH]
+
+        def write(conn: sqlite3.Connection) -> QueueResult:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A row in an upload that is in flight counts as sent: its CSV is already built
+                sent = conn.execute(
+                    "SELECT 1 FROM sent WHERE ip = ? AND sent_at > ? UNION ALL "
+                    "SELECT 1 FROM pending WHERE ip = ? AND queued_at > ? AND claimed_at > ?",
+                    (ip, now - DUPLICATE_WINDOW, ip, now - DUPLICATE_WINDOW, now - self.claim_timeout),
+                ).fetchone()
+                pending = conn.execute(
+                    "SELECT id, categories, comment FROM pending WHERE ip = ? AND queued_at > ? "
+                    "AND (claimed_by IS NULL OR claimed_at <= ?) ORDER BY id DESC LIMIT 1",
+                    (ip, now - DUPLICATE_WINDOW, now - self.claim_timeout),
+                ).fetchone()
+                if sent is not None and pending is None:
+                    status, merged_categories = "duplicate", categories
+                elif pending is not None:
+                    row_id, pending_categories, pending_comment = pending
+                    merged_categories = _merge_categories(pending_categories, categories)
+                    merged_comment = pending_comment
+                    if comment and comment not in pending_comment:
+                        merged_comment = f"{pending_comment} | {comment}" if pending_comment else comment
+                    conn.execute(
+                        "UPDATE pending SET categories = ?, comment = ? WHERE id = ?",
+                        (merged_categories, merged_comment[:COMMENT_MAX_LENGTH], row_id),
+                    )
+                    status = "merged"
+                else:
+                    conn.execute(
+                        "INSERT INTO pending (ip, categories, reported_at, comment, queued_at) VALUES (?, ?, ?, ?, ?)",
+                        (ip, categories, reported_at, comment, now),
+                    )
+                    status, merged_categories = "queued", categories
+                depth = conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return QueueResult(status=status, ip=ip, categories=merged_categories, depth=depth)
+
+        return await self._run(write)
+
+    async def depth(self) -> int:
+        return await self._run(lambda conn: conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0])
+
+    async def oldest_age(self) -> Optional[float]:
+        """Seconds since the oldest pending report was queued, or None when empty."""
+        oldest = await self._run(lambda conn: conn.execute("SELECT MIN(queued_at) FROM pending").fetchone()[0])
+        return None if oldest is None else self.clock() - oldest
+
+    async def next_batch(self) -> Optional[Batch]:
+        """Claim the next CSV upload (oldest unclaimed rows first) within the row and size limits."""
+        now = self.clock()
+
+        def claim(conn: sqlite3.Connection) -> Optional[Batch]:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, ip, categories, reported_at, comment FROM pending "
+                    "WHERE claimed_by IS NULL OR claimed_at <= ? ORDER BY id LIMIT ?",
+                    (now - self.claim_timeout, BULK_REPORT_MAX_ROWS),
+                ).fetchall()
+                batch = _build_batch(rows) if rows else None
+                if batch is not None:
+                    conn.executemany(
+                        "UPDATE pending SET claimed_by = ?, claimed_at = ? WHERE id = ?",
+                        [(self.owner, now, row_id) for row_id in batch.ids],
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return batch
+
+        return await self._run(claim)
+
+    async def complete(self, batch: Batch):
+        """Remove an uploaded batch and remember its IPs for the duplicate window."""
+        now = self.clock()
+
+        def finish(conn: sqlite3.Connection):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "DELETE FROM pending WHERE id = ? AND claimed_by = ?", [(row_id, self.owner) for row_id in batch.ids]
+                )
+                conn.executemany("INSERT OR REPLACE INTO sent (ip, sent_at) VALUES (?, ?)", [(ip, now) for ip in batch.ips])
+                conn.execute("DELETE FROM sent WHERE sent_at <= ?", (now - DUPLICATE_WINDOW,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        await self._run(finish)
+
+    async def release(self, batch: Batch):
+        """Return the rows of a failed upload to the queue for a later attempt."""
+        await self._run(lambda conn: conn.executemany(
+            "UPDATE pending SET claimed_by = NULL, claimed_at = NULL WHERE id = ? AND claimed_by = ?",
+            [(row_id, self.owner) for row_id in batch.ids],
+        ))
+
+    async def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _build_batch(rows: List[Tuple[int, str, str, str, str]]) -> Batch:
+    """CSV for the bulk-report endpoint from pending rows, cut at the size limit."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["IP", "Categories", "ReportDate", "Comment"])
+    ids, ips = [], []
+    full = len(rows) >= BULK_REPORT_MAX_ROWS
+    for row_id, ip, categories, reported_at, comment in rows:
+        mark = buffer.tell()
+        writer.writerow([ip, categories, reported_at, comment])
+        if buffer.tell() > BULK_REPORT_MAX_BYTES:
+            buffer.seek(mark)
+            buffer.truncate()
+            full = True
+            break
+        ids.append(row_id)
+        ips.append(ip)
+    return Batch(ids=ids, ips=ips, csv=buffer.getvalue().encode("utf-8"), full=full)
+
+
+def _merge_categories(existing: str, new: str) -> str:
+    merged: List[str] = []
+    for category in f"{existing},{new}".split(","):
+        if category and category not in merged:
+            merged.append(category)
+    return ",".join(merged)
+
+
+def summarize_bulk_response(data: dict) -> Tuple[int, List[dict]]:
+    """Return (saved report count, invalid report rows) from a bulk-report response."""
+    body = data.get("data", {}) if isinstance(data, dict) else {}
+    return body.get("savedReports", 0), body.get("invalidReports") or []
@@ -0,0 +1,61 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Optional
+
+import httpx
+
+# Errors raised before the request reached the server: safe to retry even for POST
+CONNECT_PHASE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@dataclass
+class RetryPolicy:
+    """Retry settings for upstream API calls.
+
+    Delays use exponential backoff with full jitter (a random delay between 0
+    and base_delay * 2**attempt, capped at max_delay) so replicas that fail
+    together don't retry in lockstep. A Retry-After header on a retryable
+    status takes precedence over the computed delay. Non-idempotent methods
+    (the report POST) are only retried when the request provably never
+    reached the API: connect-phase errors and 429 rejections.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    max_elapsed: float = 30.0
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    idempotent_methods: FrozenSet[str] = field(default_factory=lambda: frozenset({"GET", "HEAD", "OPTIONS"}))
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number attempt (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def should_retry_error(self, method: str, error: httpx.RequestError) -> bool:
+        if method.upper() in self.idempotent_methods:
+            return True
+        return isinstance(error, CONNECT_PHASE_ERRORS)
+
+    def should_retry_status(self, method: str, status: int) -> bool:
+        if status not in self.retry_statuses:
+            return False
+        return method.upper() in self.idempotent_methods or status == 429
+
+    @staticmethod
+    def retry_after(response: httpx.Response) -> Optional[float]:
+        """Seconds requested by a Retry-After header (delta-seconds or HTTP-date)."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,191 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import Field, field_validator
+from pydantic.fields import FieldInfo
+from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+
+class Settings(BaseSettings):
+    """Typed server configuration.
+
+    Every field is read from an ``ABUSEIPDB_``-prefixed environment variable
+    (``cache_ttl`` -> ``ABUSEIPDB_CACHE_TTL``), a ``.env`` file in the working
+    directory, or a JSON/TOML file named by ``ABUSEIPDB_CONFIG``, in that
+    order of precedence. The exception is ``workers``, read from
+    ``MCP_WORKERS`` like the other transport settings. Command line flags
+    are applied as environment variables so HTTP worker processes inherit
+    them.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="ABUSEIPDB_",
+        env_file=".env",
+        extra="ignore",
+        populate_by_name=True,
+    )
+
+    api_key: Optional[str] = None
+    api_keys: str = Field("", description="Additional keys, comma or whitespace separated, pooled with api_key")
+    key_disable_seconds: float = Field(3600.0, ge=0)
+    base_url: str = "https://api.abuseipdb.com/api/v2"
+    user_agent: str = "AbuseIPDB-MCP-Server/1.3"
+    proxy: Optional[str] = Field(None, description="Explicit proxy URL (default: HTTPS_PROXY/HTTP_PROXY)")
+
+    # Upstream HTTP client
+    connect_timeout: float = Field(30.0, gt=0)
+    read_timeout: float = Field(30.0, gt=0)
+    write_timeout: float = Field(30.0, gt=0)
+    pool_timeout: float = Field(30.0, gt=0)
+    max_connections: int = Field(20, ge=1)
+    max_keepalive: int = Field(10, ge=0)
+    keepalive_expiry: float = Field(30.0, ge=0)
+    http2: bool = False
+
+    # check_ip result cache
+    cache_max_entries: int = Field(1024, ge=0)
+    cache_ttl: float = Field(3600.0, ge=0)
+    cache_negative_ttl: float = Field(300.0, ge=0)
+    cache_stale_ttl: float = Field(600.0, ge=0)
+    cache_backend: str = "memory"
+    cache_path: str = os.path.join("logs", "abuseipdb-cache.db")
+    cache_compact_interval: float = Field(3600.0, ge=0)
+
+    # Proactive refresh of hot entries
+    hot_refresh_top_n: int = Field(0, ge=0)
+    hot_refresh_interval: float = Field(60.0, gt=0)
+    hot_refresh_ahead: float = Field(300.0, ge=0)
+    hot_refresh_quota_share: float = Field(0.1, ge=0, le=1)
+
+    # Retries
+    retry_max_attempts: int = Field(3, ge=1)
+    retry_base_delay: float = Field(0.5, ge=0)
+    retry_max_delay: float = Field(10.0, ge=0)
+    retry_max_elapsed: float = Field(30.0, ge=0)
+
+    # Client-side rate limiting
+    rate_pacing: bool = False
+    rate_burst_fraction: float = Field(0.2, ge=0, le=1)
+    rate_max_wait: float = Field(10.0, ge=0)
+    rate_shared_path: str = ""
+    workers: int = Field(1, ge=1, validation_alias="MCP_WORKERS")
+
+    # Tracing
+    tracing: str = ""
+    tracing_file: str = os.path.join("logs", "traces.jsonl")
+    otlp_endpoint: str = "http://localhost:4318/v1/traces"
+
+    # check-block cache (defaults to cache_ttl)
+    block_cache_max_blocks: int = Field(64, ge=0)
+    block_cache_ttl: Optional[float] = Field(None, ge=0)
+
+    # Blacklist snapshot
+    blacklist_refresh_interval: float = Field(0.0, ge=0)
+    blacklist_confidence_minimum: int = Field(100, ge=25, le=100)
+    blacklist_limit: int = Field(10000, ge=1)
+    blacklist_skip_upstream: bool = True
+    blacklist_path: str = os.path.join("logs", "abuseipdb-blacklist.bin")
+
+    # Batched reports
+    report_queue: bool = False
+    report_queue_path: str = os.path.join("logs", "abuseipdb-reports.db")
+    report_flush_interval: float = Field(21600.0, gt=0)
+    report_flush_size: int = Field(1000, ge=1)
+
+    # Lookups
+    offline: bool = False
+    local_non_public: bool = True
+    verbose_max_reports: int = Field(100, ge=0)
+    bulk_concurrency: int = Field(5, ge=1)
+    bulk_max_concurrency: int = Field(20, ge=1)
+    bulk_max_addresses: int = Field(500, ge=1)
+    scan_log_dirs: str = Field("", description="Directories scan_log may read files from, separated by os.pathsep or commas")
+
+    # Local ASN/geo enrichment
+    enrichment_databases: str = Field("", description=".mmdb or CSV files, separated by os.pathsep or commas")
+
+    @field_validator("base_url")
+    @classmethod
+    def _strip_trailing_slash(cls, value: str) -> str:
+        return value.rstrip("/")
+
+    @property
+    def key_list(self) -> List[str]:
+        """All configured API keys, de-duplicated, api_key first."""
+        keys = [self.api_key] if self.api_key else []
+        keys += re.split(r"[\s,;]+", self.api_keys)
+        return list(dict.fromkeys(key for key in keys if key))
+
+    @property
+    def scan_log_dir_list(self) -> List[str]:
+        """Resolved scan_log directories; empty disables reading server-side files."""
+        return [os.path.realpath(path) for path in _split_paths(self.scan_log_dirs)]
+
+    @property
+    def enrichment_database_list(self) -> List[str]:
+        return _split_paths(self.enrichment_databases)
+
+    @property
+    def effective_block_cache_ttl(self) -> float:
+        return self.cache_ttl if self.block_cache_ttl is None else self.block_cache_ttl
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        return init_settings, env_settings, dotenv_settings, ConfigFileSource(settings_cls)
+
+
+def _split_paths(value: str) -> List[str]:
+    return [path.strip() for path in re.split(rf"[,{re.escape(os.pathsep)}]", value) if path.strip()]
+
+
+class ConfigFileSource(PydanticBaseSettingsSource):
+    """Settings from the JSON or TOML file named by ABUSEIPDB_CONFIG.
+
+    Keys are field names, optionally with the ABUSEIPDB_ prefix and in any
+    case, so an env file's variable names can be reused as-is.
+    """
+
+    def __init__(self, settings_cls: Type[BaseSettings]):
+        super().__init__(settings_cls)
+        self.path = os.getenv("ABUSEIPDB_CONFIG", "")
+        self._values = self._load() if self.path else {}
+
+    def _load(self) -> Dict[str, Any]:
+        if self.path.endswith(".toml"):
+            if tomllib is None:
+                raise ValueError("TOML config files require Python 3.11+; use JSON instead")
+            with open(self.path, "rb") as handle:
+                raw = tomllib.load(handle)
+        else:
+            with open(self.path, encoding="utf-8") as handle:
+                raw = json.load(handle)
+        values = {}
+        for key, value in raw.items():
+            key = key.lower()
+            values[key[len("abuseipdb_"):] if key.startswith("abuseipdb_") else key] = value
+        return values
+
+    def get_field_value(self, field: FieldInfo, field_name: str) -> Tuple[Any, str, bool]:
+        return self._values.get(field_name), field_name, False
+
+    def __call__(self) -> Dict[str, Any]:
+        return {name: self._values[name] for name in self.settings_cls.model_fields if name in self._values}
+
+
+def load_settings(**overrides: Any) -> Settings:
+    """Load settings from the environment, .env and config file, with keyword overrides on top."""
+    return Settings(**overrides)
@@ -0,0 +1,336 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Type
+
+from .cache import CacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Interface for durable cache stores shared across restarts and replicas.
+
+    Keys are strings and values are JSON-serializable. Implementations
+    (SQLite here; a Redis-compatible store can be plugged in the same way)
+    must treat expired entries as missing.
+    """
+
+    async def get(self, key: str, include_expired: bool = False) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: CacheEntry):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def compact(self) -> int:
+        """Drop expired entries and return how many were removed."""
+        return 0
+
+    async def close(self):
+        pass
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite (WAL mode) cache store.
+
+    The database is opened lazily on first use so a large file never delays
+    server startup, and a background task periodically purges expired rows.
+    WAL mode lets several processes on the same volume read while one writes.
+    """
+
+    def __init__(self, path: str, compact_interval: float = 3600.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.compact_interval = compact_interval
+        self.clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._compactor: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, negative INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+            self._conn = conn
+            logger.info(f"Opened persistent cache at {self.path}")
+        return self._conn
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], object]):
+        self._ensure_compactor()
+
+        def call():
+            with self._lock:
+                return fn(self._connect())
+
+        return await asyncio.to_thread(call)
+
+    def _ensure_compactor(self):
+        if self.compact_interval > 0 and (self._compactor is None or self._compactor.done()):
+            self._compactor = asyncio.get_running_loop().create_task(self._compact_periodically())
+
+    async def _compact_periodically(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                removed = await self.compact()
+                logger.debug(f"Persistent cache compaction removed {removed} expired entries")
+            except Exception as error:
+                logger.warning(f"Persistent cache compaction failed: {error}")
+
+    async def get(self, key: str, include_expired: bool = False) -> Optional[CacheEntry]:
+        now = float("-inf") if include_expired else self.clock()
+        row = await self._run(lambda conn: conn.execute(
+            "SELECT value, stored_at, expires_at, negative FROM cache WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone())
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CacheEntry(value=json.loads(row[0]), stored_at=row[1], expires_at=row[2], negative=bool(row[3]))
+
+    async def set(self, key: str, entry: CacheEntry):
+        params = (key, json.dumps(entry.value, separators=(",", ":")), entry.stored_at, entry.expires_at, int(entry.negative))
+        await self._run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at, negative) VALUES (?, ?, ?, ?, ?)",
+            params,
+        ))
+
+    async def delete(self, key: str):
+        await self._run(lambda conn: conn.execute("DELETE FROM cache WHERE key = ?", (key,)))
+
+    async def compact(self) -> int:
+        now = self.clock()
+
+        def purge(conn: sqlite3.Connection) -> int:
+            removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return removed
+
+        return await self._run(purge)
+
+    def iter_entries(self, include_expired: bool = False, batch_size: int = 1000) -> Iterator[Tuple[str, CacheEntry]]:
+        """Stream stored entries in key order, one short read per batch (synchronous; used by cache export)."""
+        after = ""
+        while True:
+            now = float("-inf") if include_expired else self.clock()
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT key, value, stored_at, expires_at, negative FROM cache "
+                    "WHERE key > ? AND expires_at > ? ORDER BY key LIMIT ?",
+                    (after, now, batch_size),
+                ).fetchall()
+            for key, value, stored_at, expires_at, negative in rows:
+                yield key, CacheEntry(value=json.loads(value), stored_at=stored_at, expires_at=expires_at, negative=bool(negative))
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+    def put_entries(self, entries: Iterable[Tuple[str, CacheEntry]], batch_size: int = 1000) -> int:
+        """Insert entries in one transaction per batch, keeping whichever copy of a key is newer (used by cache import)."""
+        count = 0
+        batch = []
+        for key, entry in entries:
+            batch.append((key, json.dumps(entry.value, separators=(",", ":")), entry.stored_at, entry.expires_at, int(entry.negative)))
+            if len(batch) >= batch_size:
+                count += self._write_batch(batch)
+                batch = []
+        if batch:
+            count += self._write_batch(batch)
+        return count
+
+    def _write_batch(self, rows) -> int:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT INTO cache (key, value, stored_at, expires_at, negative) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, stored_at = excluded.stored_at, "
+                    "expires_at = excluded.expires_at, negative = excluded.negative "
+                    "WHERE excluded.stored_at > cache.stored_at",
+                    rows,
+                )
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return len(rows)
+
+    async def close(self):
+        if self._compactor is not None:
+            self._compactor.cancel()
+            self._compactor = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+CACHE_BACKENDS: Dict[str, Type[CacheBackend]] = {
+    "sqlite": SQLiteCacheBackend,
+}
+
+
+class SQLiteBudgetStore:
+    """Rate limit budgets shared by processes on one host (e.g. HTTP workers).
+
+    Each process publishes the X-RateLimit-* values it last saw per endpoint
+    and periodically loads what the others published. Calls are blocking
+    single-row statements with a short busy timeout, made from a worker
+    thread by QuotaRateLimiter; failures are logged and otherwise ignored so
+    a locked database never fails a request. A namespace keeps the budgets
+    of different API keys apart in one file.
+    """
+
+    def __init__(self, path: str, namespace: str = ""):
+        self.path = path
+        self.namespace = namespace
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS budgets ("
+                "endpoint TEXT PRIMARY KEY, quota_limit INTEGER, remaining INTEGER NOT NULL, "
+                "reset_at REAL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def publish(self, endpoint: str, limit: Optional[int], remaining: int, reset_at: Optional[float], updated_at: float):
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT INTO budgets (endpoint, quota_limit, remaining, reset_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (endpoint) DO UPDATE SET quota_limit = excluded.quota_limit, "
+                    "remaining = excluded.remaining, reset_at = excluded.reset_at, updated_at = excluded.updated_at "
+                    "WHERE excluded.updated_at >= budgets.updated_at",
+                    (self.namespace + endpoint, limit, remaining, reset_at, updated_at),
+                )
+        except sqlite3.Error as error:
+            logger.warning(f"Shared rate limit write failed: {error}")
+
+    def load(self) -> Dict[str, Tuple[Optional[int], int, Optional[float], float]]:
+        """Return endpoint -> (limit, remaining, reset_at, updated_at) as last published by any process."""
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT endpoint, quota_limit, remaining, reset_at, updated_at FROM budgets WHERE substr(endpoint, 1, ?) = ?",
+                    (len(self.namespace), self.namespace),
+                ).fetchall()
+        except sqlite3.Error as error:
+            logger.warning(f"Shared rate limit read failed: {error}")
+            return {}
+        return {row[0][len(self.namespace):]: (row[1], row[2], row[3], row[4]) for row in rows}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SQLiteLease:
+    """A named lease in a SQLite file, held by at most one process at a time.
+
+    Used to elect the worker that runs singleton background jobs. acquire()
+    takes a free or expired lease, or renews one this owner already holds;
+    the holder must call it again within ttl seconds to keep it, so a
+    process that dies loses the lease after ttl. Calls are blocking; run
+    them in a thread.
+    """
+
+    def __init__(self, path: str, name: str, owner: str, ttl: float = 30.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+        self.clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def acquire(self) -> bool:
+        """Take or renew the lease; True while this owner holds it."""
+        now = self.clock()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(
+                        "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                        "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                        (self.name, self.owner, now + self.ttl, now),
+                    )
+                    holder = conn.execute("SELECT owner FROM leases WHERE name = ?", (self.name,)).fetchone()
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as error:
+            logger.warning(f"Lease '{self.name}' check failed: {error}")
+            return False
+        return holder is not None and holder[0] == self.owner
+
+    def release(self):
+        """Give the lease up early so another process can take it without waiting for ttl."""
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+        except sqlite3.Error as error:
+            logger.warning(f"Lease '{self.name}' release failed: {error}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_cache_backend(name: str, path: str, compact_interval: float = 3600.0) -> Optional[CacheBackend]:
+    """Build the durable cache backend selected by name ('memory' or empty means none)."""
+    name = (name or "memory").lower()
+    if name == "memory":
+        return None
+    backend_cls = CACHE_BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown cache backend '{name}'. Supported: memory, {', '.join(CACHE_BACKENDS)}")
+    return backend_cls(path, compact_interval=compact_interval)
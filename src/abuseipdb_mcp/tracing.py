@@ -0,0 +1,245 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("abuseipdb_current_span", default=None)
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    """A timed operation; use as a context manager to make it the current span."""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_span_id", "attributes", "events",
+                 "start_ns", "end_ns", "status_code", "status_message", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes) if attributes else {}
+        self.events: List[Dict[str, Any]] = []
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status_code = 0
+        self.status_message = ""
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        event = {"timeUnixNano": str(time.time_ns()), "name": name}
+        if attributes:
+            event["attributes"] = _otlp_attributes(attributes)
+        self.events.append(event)
+
+    def set_status(self, ok: bool, message: str = ""):
+        self.status_code = STATUS_OK if ok else STATUS_ERROR
+        self.status_message = message
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and self.status_code != STATUS_ERROR:
+            self.set_status(False, f"{exc_type.__name__}: {exc}")
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        self.tracer._on_end(self)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": self.events,
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class _NoopSpan:
+    """Shared stand-in returned when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        pass
+
+    def set_status(self, ok: bool, message: str = ""):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class FileSpanExporter:
+    """Append each batch as one OTLP/JSON ExportTraceServiceRequest line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def export(self, payload: Dict[str, Any]):
+        line = json.dumps(payload, separators=(",", ":")) + "\n"
+
+        def write():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line)
+
+        await asyncio.to_thread(write)
+
+    async def close(self):
+        pass
+
+
+class OTLPHttpSpanExporter:
+    """POST batches as OTLP/JSON to a collector's /v1/traces endpoint."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def export(self, payload: Dict[str, Any]):
+        response = await self._client.post(self.endpoint, json=payload)
+        response.raise_for_status()
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class Tracer:
+    """Minimal OpenTelemetry-compatible tracer with batched export.
+
+    Without an exporter, span() returns a shared no-op span, so
+    instrumentation costs one attribute check and call per site.
+    """
+
+    def __init__(self, exporter=None, service_name: str = "abuseipdb-mcp", batch_size: int = 128, flush_interval: float = 5.0):
+        self.exporter = exporter
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Span] = []
+        self._last_flush = time.monotonic()
+        self._flushes = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        if self.exporter is None:
+            return NOOP_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    def _on_end(self, span: Span):
+        self._pending.append(span)
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            try:
+                task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                return
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def flush(self):
+        spans, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if not spans or self.exporter is None:
+            return
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "abuseipdb_mcp"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        try:
+            await self.exporter.export(payload)
+        except Exception as error:
+            logger.warning(f"Trace export failed ({len(spans)} spans dropped): {error}")
+
+    async def shutdown(self):
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+        if self.exporter is not None:
+            await self.exporter.close()
+
+
+def httpx_trace_hook(span):
+    """httpx 'trace' extension callback recording connection phases on span.
+
+    Each httpcore '<phase>.started'/'<phase>.complete' pair (TCP connect
+    including DNS, TLS handshake, sending the request, waiting for response
+    headers, ...) becomes an event plus a 'http.phase.<phase>_ms' attribute.
+    """
+    started: Dict[str, int] = {}
+
+    async def trace(event_name: str, info: Dict[str, Any]):
+        now = time.perf_counter_ns()
+        span.add_event(event_name)
+        phase, _, stage = event_name.rpartition(".")
+        if stage == "started":
+            started[phase] = now
+        elif stage in ("complete", "failed") and phase in started:
+            span.set_attribute(f"http.phase.{phase}_ms", (now - started.pop(phase)) / 1e6)
+
+    return trace
+
+
+def create_tracer(mode: str, file_path: str, otlp_endpoint: str) -> Tracer:
+    """Build the tracer selected by ABUSEIPDB_TRACING ('', 'file' or 'otlp')."""
+    mode = (mode or "").lower()
+    if not mode or mode in ("0", "false", "off", "none"):
+        return Tracer()
+    if mode == "file":
+        return Tracer(FileSpanExporter(file_path))
+    if mode == "otlp":
+        return Tracer(OTLPHttpSpanExporter(otlp_endpoint))
+    raise ValueError(f"Unknown tracing mode '{mode}'. Supported: file, otlp")
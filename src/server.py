@@ -6,11 +6,10 @@ import logging
 import os
 import sys
 
-# Support both direct execution (python src/server.py) and package import (uvx/pip)
-try:
-    from abuseipdb_mcp.modules import AbuseIPDBServer
-except ImportError:
-    from modules import AbuseIPDBServer
+# Direct execution (python src/server.py) puts src/ on sys.path, so the package imports either way
+from abuseipdb_mcp.bundle import BUNDLE_FORMATS, export_cache, import_cache
+from abuseipdb_mcp.modules import AbuseIPDBServer, run_http_workers
+from abuseipdb_mcp.settings import load_settings
 
 
 def main():
@@ -28,7 +27,11 @@ Examples:
   python src/server.py                       # direct execution
   mcp-abuseipdb --transport http             # HTTP on 0.0.0.0:8000
   mcp-abuseipdb --transport http --port 3000 # HTTP on custom port
+  mcp-abuseipdb -t http --workers 4          # 4 worker processes, shared cache
   MCP_TRANSPORT=http mcp-abuseipdb           # via env var
+  mcp-abuseipdb --offline                    # answer from local data only
+  mcp-abuseipdb cache export cache.bin       # cache bundle for another host
+  mcp-abuseipdb cache import cache.bin       # merge a bundle into the cache
         """
     )
     parser.add_argument(
@@ -48,6 +51,50 @@ Examples:
         default=None,
         help="Port to bind for HTTP transport (default: 8000). Can also be set via MCP_PORT env var"
     )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=None,
+        help="HTTP worker processes (default: 1). Can also be set via MCP_WORKERS env var"
+    )
+    parser.add_argument(
+        "--stateless",
+        action="store_true",
+        default=None,
+        help="Serve HTTP requests without sessions (default with more than one worker). Can also be set via MCP_HTTP_STATELESS env var"
+    )
+    parser.add_argument(
+        "--config", "-c",
+        default=None,
+        help="JSON or TOML settings file (keys as in ABUSEIPDB_* env vars). Can also be set via ABUSEIPDB_CONFIG env var"
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="AbuseIPDB API base URL, e.g. a local mock or caching gateway. Can also be set via ABUSEIPDB_BASE_URL env var"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        default=None,
+        help="Answer only from the local cache and blacklist snapshot, never call the API. Can also be set via ABUSEIPDB_OFFLINE env var"
+    )
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    cache_parser = commands.add_parser("cache", help="Export or import the persistent check cache and blacklist snapshot")
+    cache_commands = cache_parser.add_subparsers(dest="cache_command", metavar="action", required=True)
+    export_parser = cache_commands.add_parser("export", help="Write the cache to a bundle file")
+    export_parser.add_argument("path", help="Bundle file to write")
+    export_parser.add_argument(
+        "--format", "-f",
+        choices=BUNDLE_FORMATS,
+        default=None,
+        help="Bundle format (default: jsonl for *.jsonl / *.jsonl.gz, otherwise gzip-compressed binary)"
+    )
+    export_parser.add_argument("--include-expired", action="store_true", help="Also export entries past their TTL")
+    import_parser = cache_commands.add_parser("import", help="Merge a bundle into the cache (newer entries win)")
+    import_parser.add_argument("path", help="Bundle file to read (format detected automatically)")
+    import_parser.add_argument("--skip-expired", action="store_true", help="Skip entries already past their TTL")
 
     args = parser.parse_args()
 
@@ -55,8 +102,30 @@ Examples:
     transport = args.transport or os.getenv("MCP_TRANSPORT", "stdio")
     host = args.host or os.getenv("MCP_HOST", "0.0.0.0")
     port = args.port or int(os.getenv("MCP_PORT", "8000"))
+    workers = args.workers or int(os.getenv("MCP_WORKERS", "1"))
+    stateless = args.stateless
+    if stateless is None and os.getenv("MCP_HTTP_STATELESS"):
+        stateless = os.getenv("MCP_HTTP_STATELESS").lower() in ("1", "true", "yes")
 
-    server = AbuseIPDBServer()
+    # Settings flags are passed on through the environment so HTTP worker processes see them too
+    if args.config:
+        os.environ["ABUSEIPDB_CONFIG"] = args.config
+    if args.base_url:
+        os.environ["ABUSEIPDB_BASE_URL"] = args.base_url
+    if args.offline:
+        os.environ["ABUSEIPDB_OFFLINE"] = "true"
+
+    if args.command == "cache":
+        run_cache_command(args)
+        return
+
+    try:
+        settings = load_settings()
+        # With several HTTP workers, uvicorn's worker processes each build their own server
+        server = None if transport == "http" and workers > 1 else AbuseIPDBServer(settings)
+    except (OSError, ValueError) as error:
+        print(f"❌ Invalid configuration: {error}", file=sys.stderr)
+        sys.exit(1)
 
     if transport == "stdio":
         asyncio.run(server.run())
@@ -65,12 +134,40 @@ Examples:
             level=logging.INFO,
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         )
-        server.run_http(host=host, port=port)
+        if server is None:
+            run_http_workers(settings, host=host, port=port, workers=workers, stateless=stateless)
+        else:
+            server.run_http(host=host, port=port, workers=workers, stateless=stateless)
     else:
         print(f"❌ Unknown transport: {transport}", file=sys.stderr)
         print("   Supported: stdio, http", file=sys.stderr)
         sys.exit(1)
 
 
+def run_cache_command(args):
+    """Export or import the persistent cache as a streaming bundle."""
+    try:
+        settings = load_settings()
+        if args.cache_command == "export":
+            count, blacklisted = asyncio.run(
+                export_cache(settings.cache_path, args.path, args.format, args.include_expired, settings.blacklist_path)
+            )
+            print(f"✅ Exported {count} cache entries from {settings.cache_path} to {args.path}")
+            if blacklisted is not None:
+                print(f"   Included the blacklist snapshot ({blacklisted} addresses) from {settings.blacklist_path}")
+        else:
+            count, blacklisted = asyncio.run(
+                import_cache(settings.cache_path, args.path, args.skip_expired, settings.blacklist_path)
+            )
+            print(f"✅ Imported {count} cache entries from {args.path} into {settings.cache_path}")
+            if blacklisted is not None:
+                print(f"   Saved the bundled blacklist snapshot ({blacklisted} addresses) to {settings.blacklist_path}")
+            if settings.cache_backend == "memory":
+                print("   Set ABUSEIPDB_CACHE_BACKEND=sqlite for the server to use them")
+    except (OSError, ValueError) as error:
+        print(f"❌ Cache {args.cache_command} failed: {error}", file=sys.stderr)
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file